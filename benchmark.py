@@ -0,0 +1,200 @@
+"""
+benchmark of the transformation itself
+
+python benchmark.py [-o results.json] [--compare baseline.json] [--backends splitting polyhedral] [--trace-memory] [cases...]
+
+every case runs in a fresh process so neither sympy's caches nor the peak memory of one case affect another
+"""
+import argparse, json, sys, time, platform, textwrap, hashlib, pathlib, tracemalloc, concurrent.futures
+import sympy
+import loop_to_constant as ltc
+
+try:
+    import resource
+except ImportError:
+    resource = None  # windows, peak memory isn't recorded
+
+
+REAL_WORLD_EXAMPLE = """
+for i in range(min0, min(UPPER, SUM) + 1):
+    SUM_i = SUM - i
+    for j in range(min1, min(UPPER, SUM_i) + 1):
+        SUM_i_j = SUM_i - j
+        for k in range(min2, min(UPPER, SUM_i_j) + 1):
+            SUM_i_j_k = SUM_i_j - k
+            for l in range(min3, min(UPPER, SUM_i_j_k) + 1):
+                SUM_i_j_k_l = SUM_i_j_k - l
+                m = SUM_i_j_k_l
+                if (min4 <= m) & (m <= UPPER):
+                    result += 1
+"""
+
+def real_world_example(depth : int) -> str:
+    """the innermost depth loops (with the assignments before them) of the real world example, depth 4 is the complete example"""
+    assert 1 <= depth <= 4, f"depth must be in [1, 4], not {depth}"
+    lines = REAL_WORLD_EXAMPLE.strip("\n").splitlines()
+    # the loops are on every other line, each one preceded by the assignment of its upper bound's sum
+    start = 0 if depth == 4 else 2 * (4 - depth) - 1
+    return textwrap.dedent("\n".join(lines[start:])) + "\n"
+
+CASES = {
+    "constant" : """
+for i in range(a, b):
+    r += 1
+""",
+    "index" : """
+for i in range(a, b):
+    r += i
+""",
+    "if" : """
+for i in range(a, b):
+    if c < i:
+        r += x
+""",
+    "nested" : """
+for i in range(a, b):
+    for j in range(c, d):
+        r += i + j
+""",
+    "triangular" : """
+for i in range(a, b):
+    for j in range(c, i):
+        r += j
+""",
+    "max_min" : """
+for i in range(a, b):
+    for j in range(c, max(f, i)):
+        if e < max(g, i):
+            result += min(h, i) + j
+""",
+} | {f"real_world_{depth}" : real_world_example(depth) for depth in range(1, 5)}
+"""the loops from the motivation section of the readme and the real world example at depths 1 to 4"""
+
+
+def run_case(source : str, settings : dict, trace_memory : bool = False) -> dict:
+    """
+    transform source phase by phase, returns times, peak memory, branch counts and line counts
+    with trace_memory the peak of the memory allocated by python objects is traced too, which is more precise than the peak rss but slows the transformation down
+    and the memory still allocated after the resolution once sympy's caches are cleared, which is roughly the size of the resolved block
+    """
+    if trace_memory:
+        tracemalloc.start()
+    times = {}
+    def phase(name, function):
+        start = time.perf_counter()
+        result = function()
+        times[name] = time.perf_counter() - start
+        return result
+
+    context = ltc.TransformContext(**(settings | {"print_info" : False}))
+    statements = phase("parse", lambda: ltc.Python.parse(source, context = context))
+    resolved = phase("resolve", lambda: statements.resolve(context))
+    if trace_memory:
+        sympy.core.cache.clear_cache()
+        resolved_mb = tracemalloc.get_traced_memory()[0] / 2**20
+    cse = phase("cse", lambda: resolved.cse(context))
+    python = phase("dump_python", cse.dump_python)
+    cpp = phase("dump_cpp", cse.dump_cpp)
+
+    return {
+        "times" : times,
+        "total_time" : sum(times.values()),
+        # ru_maxrss is in kilobytes on linux and in bytes on macos
+        "peak_memory_mb" : None if resource is None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2**20 if sys.platform == "darwin" else 2**10),
+        "traced_peak_mb" : tracemalloc.get_traced_memory()[1] / 2**20 if trace_memory else None,
+        "resolved_mb" : resolved_mb if trace_memory else None,
+        "top_level_branches" : len(resolved),
+        "branches" : context.metrics.get("branches", 0),
+        "split_cases" : context.metrics.get("split cases", 0),
+        "cse_temporaries" : context.metrics.get("cse temporaries", 0),
+        "python_lines" : len(python.splitlines()),
+        "cpp_lines" : len(cpp.splitlines()),
+        "budget_report" : context.budget.report,
+    }
+
+def run_isolated(source : str, settings : dict, trace_memory : bool = False) -> dict:
+    with concurrent.futures.ProcessPoolExecutor(1, max_tasks_per_child = 1) as executor:
+        return executor.submit(run_case, source, settings, trace_memory).result()
+
+def compare(results : dict, baseline : dict, threshold : float, min_difference : float = 0.5) -> bool:
+    """
+    print the differences to baseline, returns whether a case got slower or needs more memory than threshold allows
+    time differences below min_difference seconds are regarded as noise
+    """
+    regression = False
+    for name, result in results["cases"].items():
+        old = baseline["cases"].get(name)
+        if old is None:
+            continue
+        messages = []
+        for key in ("total_time", "peak_memory_mb", "traced_peak_mb", "resolved_mb"):
+            if result.get(key) and old.get(key):
+                ratio = result[key] / old[key]
+                if ratio > threshold and (key != "total_time" or result[key] - old[key] > min_difference):
+                    regression = True
+                    messages.append(f"{key} {old[key]:.2f} -> {result[key]:.2f} ({ratio:.2f}x)")
+        for key in ("branches", "cse_temporaries", "python_lines", "cpp_lines"):
+            if key in old and result[key] != old[key]:
+                messages.append(f"{key} {old[key]} -> {result[key]}")
+        if bool(result["budget_report"]) != bool(old["budget_report"]):
+            messages.append("budget exceeded" if result["budget_report"] else "budget no longer exceeded")
+        if messages:
+            print(f"{name}: {', '.join(messages)}")
+    return regression
+
+def compare_backends(results : dict, backends : list[str]) -> None:
+    """print time and output size of every backend relative to the first one"""
+    for name in dict.fromkeys(key.rpartition("[")[0] for key in results["cases"]):
+        first = results["cases"][f"{name}[{backends[0]}]"]
+        columns = []
+        for backend in backends:
+            result = results["cases"][f"{name}[{backend}]"]
+            exceeded = ", budget exceeded" if result["budget_report"] else ""
+            columns.append(f"{backend} {result['total_time']:.2f}s ({result['total_time'] / max(first['total_time'], 1e-9):.2f}x), "
+                           f"{result['python_lines']} python / {result['cpp_lines']} c++ lines{exceeded}")
+        print(f"{name}: {'; '.join(columns)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "benchmark the transformation of the readme's loops and the real world example")
+    parser.add_argument("cases", nargs = "*", default = list(CASES), help = f"cases to run (default: all), available: {', '.join(CASES)}")
+    parser.add_argument("-o", "--output", help = "write the results to this json file")
+    parser.add_argument("--compare", help = "json file of an earlier run to compare against")
+    parser.add_argument("--threshold", type = float, default = 1.25, help = "slow down (or memory increase) factor regarded as a regression")
+    parser.add_argument("--time-budget", type = float, default = 600, help = "time budget per case in seconds, loops exceeding it are kept")
+    parser.add_argument("--set", action = "append", default = [], metavar = "NAME=VALUE", help = "setting of TransformContext, e.g. --set count_compositions=False")
+    parser.add_argument("--backends", nargs = "+", choices = ltc.TransformContext.backends, help = "run every case with each backend and compare them to the first one")
+    parser.add_argument("--trace-memory", action = "store_true", help = "also trace the peak of the memory allocated by python objects (slower)")
+    arguments = parser.parse_args()
+
+    settings = ltc.CommandLine.parse_settings(arguments.set) | {"time_budget" : arguments.time_budget}
+    # a single run keeps the case names so its results can be compared to earlier runs
+    runs = [(name, settings) for name in arguments.cases] if not arguments.backends else \
+           [(f"{name}[{backend}]", settings | {"backend" : backend}) for name in arguments.cases for backend in arguments.backends]
+    results = {
+        "module_hash" : hashlib.sha256(pathlib.Path(ltc.__file__).read_bytes()).hexdigest(),
+        "python" : platform.python_version(),
+        "sympy" : sympy.__version__,
+        "machine" : platform.platform(),
+        "date" : time.strftime("%Y-%m-%d %H:%M:%S"),
+        "settings" : settings,
+        "cases" : {},
+    }
+    for name, run_settings in runs:
+        result = run_isolated(CASES[name.partition("[")[0]], run_settings, arguments.trace_memory)
+        results["cases"][name] = result
+        phases = ", ".join(f"{phase} {t:.2f}s" for phase, t in result["times"].items())
+        memory = "" if result["peak_memory_mb"] is None else f", {result['peak_memory_mb']:.0f} MB"
+        if result["traced_peak_mb"] is not None:
+            memory += f" ({result['traced_peak_mb']:.1f} MB traced, {result['resolved_mb']:.1f} MB after resolve)"
+        exceeded = ", budget exceeded" if result["budget_report"] else ""
+        print(f"{name}: {result['total_time']:.2f}s ({phases}){memory}, {result['branches']} branches, {result['cse_temporaries']} cse temporaries, "
+              f"{result['python_lines']} python / {result['cpp_lines']} c++ lines{exceeded}", flush = True)
+
+    if arguments.backends:
+        compare_backends(results, arguments.backends)
+
+    if arguments.output:
+        pathlib.Path(arguments.output).write_text(json.dumps(results, indent = 4))
+
+    if arguments.compare and compare(results, json.loads(pathlib.Path(arguments.compare).read_text()), arguments.threshold):
+        sys.exit(1)
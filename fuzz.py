@@ -0,0 +1,148 @@
+"""
+differential fuzzer, executes the original loops and the transformed code over random and boundary parameters and compares the results
+
+python fuzz.py [--trials N] [--jobs N] files...
+
+like real_world_example_solution.py it builds a naive and a transformed function from the same snippet
+"""
+import argparse, ast, builtins, random, pathlib, sys, textwrap, concurrent.futures
+import loop_to_constant as ltc
+
+
+class Mismatch:
+    """parameters for which the original and the transformed code disagree"""
+    def __init__(self, parameters : dict[str, int], expected : dict[str, object], actual : dict[str, object]):
+        self.parameters = parameters
+        self.expected = expected
+        self.actual = actual
+        return
+
+    def __repr__(self) -> str:
+        parameters = ", ".join(f"{name} = {value}" for name, value in self.parameters.items())
+        return f"mismatch for {parameters}: expected {self.expected}, got {self.actual}"
+
+    pass
+
+def parameters_and_results(source : str) -> tuple[list[str], list[str]]:
+    """the free variables (parameters) of a snippet and the variables it increments (results)"""
+    stored, loaded, results = set(), set(), set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Name):
+            (stored if isinstance(node.ctx, ast.Store) else loaded).add(node.id)
+        if isinstance(node, ast.AugAssign) and isinstance(node.target, ast.Name):
+            results.add(node.target.id)
+    return sorted(loaded - stored - set(dir(builtins))), sorted(results)
+
+def naive_and_transformed(source : str, cse : ltc.CSEBlock) -> str:
+    """source code of the functions naive() and transformed() which take the parameters and return the results"""
+    parameters, results = parameters_and_results(source)
+    signature = ", ".join(parameters)
+    returned = "".join(f"{result}, " for result in results)
+    initialization = "".join(f"{result} = 0\n" for result in results)
+    return (
+        f"def naive({signature}):\n{textwrap.indent(initialization + textwrap.dedent(source), '    ')}\n    return ({returned})\n\n"
+        f"def transformed({signature}):\n{textwrap.indent(cse.dump_python(), '    ')}\n    return ({returned})\n"
+    )
+
+def _compare(functions : dict, results : list[str], parameters : dict[str, int], tolerance : float) -> Mismatch | None:
+    expected = functions["naive"](**parameters)
+    try:
+        actual = functions["transformed"](**parameters)
+    except Exception as exception:
+        return Mismatch(parameters, dict(zip(results, expected)), {"exception" : f"{type(exception).__name__}: {exception}"})
+    if any(abs(e - a) > tolerance * max(1, abs(e)) for e, a in zip(expected, actual)):
+        return Mismatch(parameters, dict(zip(results, expected)), dict(zip(results, actual)))
+    return None
+
+def _check_batch(code : str, results : list[str], batch : list[dict[str, int]], tolerance : float) -> Mismatch | None:
+    functions = {}
+    exec(code, functions)
+    for parameters in batch:
+        mismatch = _compare(functions, results, parameters, tolerance)
+        if mismatch is not None:
+            return mismatch
+    return None
+
+def minimize(code : str, results : list[str], mismatch : Mismatch, tolerance : float) -> Mismatch:
+    """shrink the parameters of a mismatch towards 0 as long as the results still disagree"""
+    functions = {}
+    exec(code, functions)
+    changed = True
+    while changed:
+        changed = False
+        for name, value in mismatch.parameters.items():
+            for candidate in dict.fromkeys((0, value // 2, value - 1 if value > 0 else value + 1)):
+                if abs(candidate) >= abs(value):
+                    continue
+                smaller = _compare(functions, results, mismatch.parameters | {name : candidate}, tolerance)
+                if smaller is not None:
+                    mismatch, changed = smaller, True
+                    break
+    return mismatch
+
+def parameter_tuples(parameters : list[str], trials : int, low : int, high : int, seed : int) -> list[dict[str, int]]:
+    """
+    boundary tuples (every parameter in {low, -1, 0, 1, high}) and random tuples
+    in half of the random tuples some parameters are set to another parameter +-1 because the conditions of the transformed code switch there
+    """
+    generator = random.Random(seed)
+    boundary = sorted({low, -1, 0, 1, high})
+    tuples = []
+    for _ in range(trials // 4):
+        tuples.append({name : generator.choice(boundary) for name in parameters})
+    while len(tuples) < trials:
+        values = {name : generator.randint(low, high) for name in parameters}
+        if len(parameters) > 1 and generator.random() < 0.5:
+            for name in generator.sample(parameters, generator.randint(1, len(parameters) - 1)):
+                other = generator.choice(parameters)
+                values[name] = max(low, min(high, values[other] + generator.choice((-1, 0, 1))))
+        tuples.append(values)
+    return tuples
+
+def fuzz(source : str, cse : ltc.CSEBlock, trials : int = 2000, low : int = -8, high : int = 8, jobs : int = 1,
+         seed : int = 0, tolerance : float = 1e-6, batch_size : int = 100) -> Mismatch | None:
+    """compare the original snippet and its transformation over trials parameter tuples, returns the first mismatch (minimized) or None"""
+    parameters, results = parameters_and_results(source)
+    code = naive_and_transformed(source, cse)
+    tuples = parameter_tuples(parameters, trials, low, high, seed)
+    batches = [tuples[i : i + batch_size] for i in range(0, len(tuples), batch_size)]
+
+    if jobs > 1:
+        with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+            futures = [executor.submit(_check_batch, code, results, batch, tolerance) for batch in batches]
+            # report the mismatch of the earliest batch so the result doesn't depend on scheduling
+            mismatches = [future.result() for future in futures]
+    else:
+        mismatches = (_check_batch(code, results, batch, tolerance) for batch in batches)
+
+    for mismatch in mismatches:
+        if mismatch is not None:
+            return minimize(code, results, mismatch, tolerance)
+    return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "compare snippets against their transformation")
+    parser.add_argument("files", nargs = "*", help = "files containing python snippets (default: the cases of benchmark.py up to the real world example at depth 2)")
+    parser.add_argument("--trials", type = int, default = 2000, help = "number of parameter tuples per snippet")
+    parser.add_argument("--range", type = int, nargs = 2, default = (-8, 8), metavar = ("LOW", "HIGH"), help = "range of the parameters")
+    parser.add_argument("-j", "--jobs", type = int, default = 1, help = "number of processes executing the snippets")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--set", action = "append", default = [], metavar = "NAME=VALUE", help = "setting of TransformContext, e.g. --set simplify_dnf=False")
+    arguments = parser.parse_args()
+
+    if arguments.files:
+        snippets = {path : pathlib.Path(path).read_text() for path in arguments.files}
+    else:
+        import benchmark
+        snippets = {name : source for name, source in benchmark.CASES.items() if name not in ("real_world_3", "real_world_4")}
+
+    settings = ltc.CommandLine.parse_settings(arguments.set)
+    failed = False
+    for name, source in snippets.items():
+        context = ltc.TransformContext(**(settings | {"print_info" : False}))
+        cse = ltc.Python.parse(source, context = context).resolve(context).cse(context)
+        mismatch = fuzz(source, cse, arguments.trials, *arguments.range, arguments.jobs, arguments.seed)
+        print(f"{name}: {'ok' if mismatch is None else mismatch}", flush = True)
+        failed |= mismatch is not None
+
+    sys.exit(1 if failed else 0)
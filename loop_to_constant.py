@@ -1,690 +1,3286 @@
-from __future__ import annotations
-import typing, ast
-import sympy, sympy.logic.boolalg as boolalg, sympy.core, sympy.core.relational, sympy.core.numbers, sympy.core.add
-
-
-print_info = True
-"""print debug info to the terminal (in ResolvedIf.eliminate_symbol_from_max_min and Increment.eliminate_symbol_from_max_min)"""
-simplify_increment_expression = False
-"""simplify the increment expression passed to Increment.__init__"""
-simplify_condition = False
-"""simplify the condition passed to If.__init__ and ResolvedIf.from_condition"""
-simplify_dnf = True
-"""force sympy.to_dnf to simplify its result (in If.resolve)"""
-merge_sibling_increment_statements = True
-"""merge two increment statements if they have the same symbol (in StatementBlock.resolve)"""
-conjoin_sibling_if_statements = True
-"""merge two sibling if clauses if they have the same condition (in StatementBlock.resolve)"""
-evaluate_common_subexpressions = True
-"""identify common subexpressions, collect them and evaluate them at once (in ResolvedBlock.cse)"""
-
-
-Inequality = sympy.GreaterThan | sympy.LessThan | sympy.StrictGreaterThan | sympy.StrictLessThan
-In_Equality = Inequality | sympy.Equality
-Statement = typing.Union["Increment", "If", "For"]
-
-
-class SympyMaxMinSplitter:
-    def __init__(self, symbols : tuple[sympy.Symbol]):
-        self._symbols = symbols
-        self._replace_arguments : tuple[typing.Any, bool, list[typing.Any]]
-        """target_arg, has_symbol, other_args"""
-        return
-
-    def _get_args(self, expression : typing.Any) -> typing.Optional[tuple[typing.Any, list[typing.Any], list[typing.Any]]]:
-        """returns func, symbol_args, other_args"""
-        func = expression.func
-        args = list(expression.args)
-
-        other_args : list[typing.Any] = list()
-        symbol_args = [arg for arg in args if arg.has(*self._symbols) or other_args.append(arg)]
-
-        if len(symbol_args) == 0:
-            return None    # skip this instance of max/min because no symbol
-
-        return func, symbol_args, other_args
-
-    def _replace(self, expression : typing.Any) -> typing.Any:
-        target_arg, has_symbol, other_args = self._replace_arguments
-
-        if has_symbol and target_arg not in expression.args:
-            return expression
-
-        new_args = [arg for arg in expression.args if arg not in other_args]
-
-        if len(new_args) == 1:
-            return new_args[0]
-
-        return expression.func(*new_args)
-
-    def split(self, expression : typing.Any, inequalities : list[Inequality] = []) -> list[tuple[list[Inequality], typing.Any]]:
-        for subexpr in sympy.postorder_traversal(expression):
-            if subexpr.func in (sympy.Max, sympy.Min):
-                args = self._get_args(subexpr)
-                if args != None:
-                    break
-        else:
-            return [(inequalities, expression)]
-
-        ret_val : list[tuple[list[Inequality], typing.Any]] = []
-        func, symbol_args, other_args = args
-        for i, target_arg in enumerate(symbol_args):
-            left_args = symbol_args[:i]
-            right_args = symbol_args[i+1:] + other_args
-
-            self._replace_arguments = target_arg, True, left_args + right_args
-            new_expression = expression.replace(lambda expr: expr.func == func, self._replace)
-
-            new_inequalities = inequalities.copy()
-            if func == sympy.Max:
-                # target >= left -> left <= target
-                new_inequalities += [sympy.LessThan(arg, target_arg) for arg in left_args]
-                # target > right -> right < target
-                new_inequalities += [sympy.StrictLessThan(arg, target_arg) for arg in right_args]
-            else:
-                # target <= left
-                new_inequalities += [sympy.LessThan(target_arg, arg) for arg in left_args]
-                # target < right
-                new_inequalities += [sympy.StrictLessThan(target_arg, arg) for arg in right_args]
-
-            ret_val += self.split(new_expression, new_inequalities)
-
-        if other_args:
-            left_args = symbol_args
-            target_arg = func(*other_args)
-            right_args = []
-
-            self._replace_arguments = target_arg, False, left_args + right_args
-            new_expression = expression.replace(lambda expr: expr.func == func, self._replace)
-
-            new_inequalities = inequalities.copy()
-            if func == sympy.Max:
-                new_inequalities += [sympy.LessThan(arg, target_arg) for arg in left_args]
-            else:
-                new_inequalities += [sympy.LessThan(target_arg, arg) for arg in left_args]
-
-            ret_val += self.split(new_expression, new_inequalities)
-            
-        return ret_val
-
-    pass
-
-
-def is_in_equality_tuple(val: tuple[sympy.Basic, ...]) -> typing.TypeGuard[tuple[In_Equality, ...]]:
-    return all(isinstance(x, In_Equality) for x in val)
-def is_in_equality_or_symbol_tuple(val: tuple[sympy.Basic, ...]) -> typing.TypeGuard[tuple[In_Equality | sympy.Symbol, ...]]:
-    return all(isinstance(x, In_Equality | sympy.Symbol) for x in val)
-
-def find_closing(s : str, opening : str = "(", closing : str = ")") -> tuple[int, int]:
-    """
-    find the first instance of the opening sign and the corresponding closing sign
-    returns (-1, -1) on failure
-    """
-    opening_index = s.find(opening)
-    if opening_index == -1:
-        return -1, -1
-
-    count = 0
-    for i in range(opening_index, len(s)):
-        char = s[i]
-        if char == opening:
-            count += 1
-        elif char == closing:
-            count -= 1
-        if count == 0:
-            return opening_index, i
-
-    return -1, -1
-
-
-class Assignment:
-    def __init__(self, symbol : sympy.Symbol, expr : typing.Any):
-        self.symbol = symbol
-        self.expr = expr
-        return
-
-    pass
-
-class Increment:
-    def __init__(self, symbol : sympy.Symbol, expression : typing.Any):
-        self.symbol = symbol
-        if simplify_increment_expression:
-            expression = expression.simplify()
-        self.expression = expression
-        self._split_results : dict[sympy.Symbol, list[tuple[list[Inequality], typing.Any]]] = {}
-        return
-
-    def resolve(self) -> ResolvedBlock:
-        """identity"""
-        return ResolvedBlock([self])
-
-    def eliminate_symbol_from_max_min(self, summation_index : sympy.Symbol, additional_condition : ResolvedIf.Union = sympy.true) -> ResolvedBlock:
-        try:
-            split_result = self._split_results[summation_index]
-        except KeyError:
-            if print_info:
-                print(f"splitting Increment by {summation_index}: {self.expression}")
-            split_result = SympyMaxMinSplitter((summation_index, )).split(self.expression)
-            self._split_results[summation_index] = split_result
-
-        return_block = ResolvedBlock()
-        for ineqs, expression in split_result:
-            condition : typing.Any = sympy.And(*ineqs, additional_condition).simplify()
-            assert isinstance(condition, ResolvedIf.Union), f"condition is of unexpected type {type(condition)}"
-
-            return_block.extend(ResolvedIf.from_condition(condition, [Increment(self.symbol, expression)], True))
-
-        return return_block
-
-    def summation(self, summation_index : sympy.Symbol, start : typing.Any, end : typing.Any, additional_conditions : list[In_Equality]) -> ResolvedBlock:
-        back = sympy.Add(end, -1)
-        summation_symbols = (summation_index, start, back)
-
-        summation = sympy.summation(self.expression, summation_symbols)
-        condition : typing.Any = sympy.And(sympy.StrictLessThan(start, end), *additional_conditions)
-        assert isinstance(condition, ResolvedIf.Union), f"condition is of unexpected type {type(condition)}"
-
-        return ResolvedIf.from_condition(condition, [Increment(self.symbol, summation)])
-
-    pass
-
-class If: 
-    """represents an if statement"""
-    def __init__(self, condition : typing.Any, block : StatementBlock):
-        if simplify_condition:
-            condition = condition.simplify()
-        assert isinstance(condition, Inequality | boolalg.BooleanFunction | boolalg.BooleanTrue | boolalg.BooleanFalse), f"condition must be a boolean function or inequality but is {type(condition)}"
-
-        self.condition = condition
-        self.block = block
-        return
-
-    def negate(self, block : StatementBlock) -> If:
-        return If(sympy.Not(self.condition), block)
-
-    def resolve(self) -> ResolvedBlock:
-        """
-        split into disjunctive normal form and conjugate nested if statements into a single one
-        """
-        resolved_block = self.block.resolve()
-
-        resolved_conditions : list[ResolvedIf.Union] = []
-
-        if not isinstance(self.condition, boolalg.BooleanFunction):
-            resolved_conditions.append(self.condition)
-        else:
-            dnf_condition = sympy.to_dnf(self.condition, simplify_dnf, True)
-
-            if isinstance(dnf_condition, sympy.And):
-                resolved_conditions.append(dnf_condition)
-            else:
-                assert isinstance(dnf_condition, sympy.Or), f"condition is of unexpected type {type(dnf_condition)}"
-
-                negated_conditions = True
-                for eq in dnf_condition.args:
-                    condition = sympy.And(negated_conditions, eq)
-                    assert isinstance(condition, ResolvedIf.Union), f"condition is of unexpected type {type(condition)}"
-                    resolved_conditions.append(condition)
-                    negated_conditions = sympy.And(negated_conditions, sympy.Not(eq))
-                
-        return_block = ResolvedBlock()
-
-        for resolved_condition in resolved_conditions:
-            increment_list : list[Increment] = []
-            for resolved_statement in resolved_block:
-                if isinstance(resolved_statement, Increment):
-                    increment_list.append(resolved_statement)
-                else:
-                    return_block.extend(resolved_statement.conjugate(resolved_condition))
-
-            return_block.extend(ResolvedIf.from_condition(resolved_condition, increment_list, False))
-
-        return return_block
-
-    pass
-
-class For:
-    def __init__(self, summation_index : sympy.Symbol, inequalities : list[Inequality], block : StatementBlock):
-        self.summation_index = summation_index
-        self.block = block
-        self.inequalities = inequalities
-        for inequality in self.inequalities:
-            assert inequality.has(self.summation_index), f"inequality must contain the index {self.summation_index} but is {inequality}"
-
-        return
-    
-    @staticmethod
-    def _split_inequalities(summation_index : sympy.Symbol, inequalities : list[In_Equality]) -> tuple[typing.Any, typing.Any, list[In_Equality]]:
-        starts : list[typing.Any] = []
-        ends : list[typing.Any] = []
-        remaining : list[In_Equality] = []
-
-        inequalities = [in_equality for in_equality in inequalities if in_equality.has(summation_index) or remaining.append(in_equality)]
-
-        reduce_inequalities_result : typing.Any = sympy.reduce_inequalities(inequalities, summation_index)
-        if isinstance(reduce_inequalities_result, sympy.And):
-            assert is_in_equality_tuple(reduce_inequalities_result.args), f"inequalities must be in conjunctive normal form but are {reduce_inequalities_result}"
-            reduced_inequalities = list(reduce_inequalities_result.args)
-        elif isinstance(reduce_inequalities_result, In_Equality):
-            reduced_inequalities = [reduce_inequalities_result]
-        else:
-            raise Exception(f"inequalities are of unexpected type {type(reduce_inequalities_result)}")
-        
-        for in_equality in reduced_inequalities:
-            if isinstance(in_equality.lhs, sympy.core.numbers.NegativeInfinity):
-                continue
-
-            is_lhs = in_equality.lhs == summation_index
-
-            if in_equality.rel_op == "==":
-                if is_lhs: # x = rhs
-                    starts.append(in_equality.rhs)
-                    ends.append(sympy.Add(in_equality.rhs, 1))
-                else:   # lhs = x
-                    starts.append(in_equality.lhs)
-                    ends.append(sympy.Add(in_equality.lhs, 1))
-
-            elif in_equality.rel_op == "<":
-                if is_lhs:  # x < rhs 
-                    ends.append(in_equality.rhs)
-                else:   # lhs < x
-                    starts.append(sympy.Add(in_equality.lhs, 1))
-
-            elif in_equality.rel_op == "<=": 
-                if is_lhs:  # x <= rhs 
-                    ends.append(sympy.Add(in_equality.rhs, 1))
-                else:   # lhs <= x
-                    starts.append(in_equality.lhs)
-                    
-            elif in_equality.rel_op == ">":  
-                if is_lhs:  # rhs < x
-                    starts.append(sympy.Add(in_equality.rhs, 1))
-                else:   # x < lhs
-                    ends.append(in_equality.lhs)
-                    
-            elif in_equality.rel_op == ">=":
-                if is_lhs:   # rhs <= x
-                    starts.append(in_equality.rhs)
-                else:   # x <= lhs
-                    ends.append(sympy.Add(in_equality.lhs, 1))
-
-            else:
-                raise Exception(in_equality.rel_op)
-
-        return sympy.Max(*starts), sympy.Min(*ends), remaining
-
-    def resolve(self) -> ResolvedBlock:
-        """
-        merge resolved if statements into the enclosing for statement (or extract them)
-        resolve for statement
-        """
-        resolved_block = self.block.resolve().eliminate_symbol_from_max_min(self.summation_index)
-        return_block = ResolvedBlock()
-        
-        ineqs = typing.cast(list[In_Equality], self.inequalities)
-        start, end, remaining = self._split_inequalities(self.summation_index, ineqs)
-        assert len(remaining) == 0, f"for statement can't have from {self.summation_index} independant inequalities but has {remaining}"
-
-        for resolved_statement in resolved_block:
-            if isinstance(resolved_statement, ResolvedIf):
-                if isinstance(resolved_statement.condition, sympy.And):
-                    assert is_in_equality_tuple(resolved_statement.condition.args), f"condition must be in conjunctive normal form but is {resolved_statement.condition}"
-                    new_inequalities = self.inequalities + [*resolved_statement.condition.args]
-                elif isinstance(resolved_statement.condition, In_Equality):
-                    new_inequalities = self.inequalities + [resolved_statement.condition]
-                else:
-                    raise Exception(f"condition is of unexpected type {type(resolved_statement.condition)}")
-                
-                temp_start, temp_end, additional_conditions = self._split_inequalities(self.summation_index, new_inequalities)
-
-                for increment in resolved_statement.block:
-                    return_block.extend(increment.summation(self.summation_index, temp_start, temp_end, additional_conditions))
-
-            else:
-                return_block.extend(resolved_statement.summation(self.summation_index, start, end, []))
-
-        return return_block
-
-    pass
-
-
-class ResolvedIf:
-    """represents an if statement whose condition contains only conjunctions of inequalities"""
-    Union : typing.TypeAlias = sympy.And | In_Equality | sympy.Symbol | boolalg.BooleanTrue | boolalg.BooleanFalse
-
-    @staticmethod
-    def from_condition(condition : Union, block : list[Increment], is_simplified : bool = False) -> ResolvedBlock:
-        if not block:
-            return ResolvedBlock()
-
-        if simplify_condition and is_simplified == False:
-            condition = condition.simplify()
-            assert isinstance(condition, ResolvedIf.Union), f"condition is of unexpected type {type(condition)}"
-
-        if isinstance(condition, sympy.And):
-            return ResolvedBlock([ResolvedIf(condition, block)])
-
-        elif isinstance(condition, In_Equality | sympy.Symbol):
-            return ResolvedBlock([ResolvedIf(condition, block)])
-
-        elif isinstance(condition, boolalg.BooleanTrue):
-            return ResolvedBlock(block)
-
-        elif isinstance(condition, boolalg.BooleanFalse):
-            return ResolvedBlock()
-
-        raise Exception(f"condition is of unexpected type {type(condition)}")
-
-    def __init__(self, condition : sympy.And | In_Equality | sympy.Symbol, block : list[Increment]):
-        if isinstance(condition, sympy.And):
-            assert is_in_equality_or_symbol_tuple(condition.args), f"condition must be in conjunctive normal form but is {condition}"
-        self.condition = condition
-        self.block = block
-
-        return
-
-    def conjugate(self, other_condition : Union) -> ResolvedBlock:
-        """
-        conjugates self and a condition
-        """
-        conjugated_condition = sympy.And(self.condition, other_condition)
-        assert isinstance(conjugated_condition, ResolvedIf.Union), f"conjugated condition is of unexpected type {type(conjugated_condition)}"
-        if isinstance(conjugated_condition, sympy.And):
-            assert is_in_equality_or_symbol_tuple(conjugated_condition.args), f"condition must be in conjunctive normal form but is {conjugated_condition}"
-        return ResolvedIf.from_condition(conjugated_condition, self.block)
-
-    def eliminate_symbol_from_max_min(self, summation_index : sympy.Symbol) -> ResolvedBlock:
-        return_block = ResolvedBlock()
-        
-        if print_info:
-            print(f"splitting ResolvedIf by {summation_index}: {self.condition}")
-        split_result = SympyMaxMinSplitter((summation_index, )).split(self.condition)
-        for new_inequalities, modified_condition in split_result:
-            new_condition = sympy.And(*new_inequalities, modified_condition)
-            assert isinstance(new_condition, ResolvedIf.Union), f"new condition is of unexpected type {type(new_condition)}"
-
-            for increment in self.block:
-                return_block.extend(increment.eliminate_symbol_from_max_min(summation_index, new_condition))
-                
-        return return_block
-
-    pass
-
-
-class StatementBlock(list[Statement]):
-    def resolve(self) -> ResolvedBlock:
-        """
-        merge arithmetic statements with the same symbol, conjoin if statements with the same condition
-        """
-        
-        resolved_statements = ResolvedBlock(resolved_statement for statement in self for resolved_statement in statement.resolve())
-        increment_list = [resolved_statement for resolved_statement in resolved_statements if isinstance(resolved_statement, Increment)]
-        resolved_if_list = [resolved_statement for resolved_statement in resolved_statements if isinstance(resolved_statement, ResolvedIf)]
-        
-        # merge increments with the same symbol
-        def merge_increment(increment_list : list[Increment]) -> list[Increment]:
-            increment_dict : dict[sympy.Symbol, list[Increment]] = {}
-            for increment in increment_list:
-                increment_dict.setdefault(increment.symbol, []).append(increment)
-
-            return [Increment(symbol, sum(increment.expression for increment in increments)) for symbol, increments in increment_dict.items()]
-
-        # conjoin if statements with the same condition
-        if conjoin_sibling_if_statements:
-            n = len(resolved_if_list)
-            for i in range(n - 1, -1, -1):
-                check_resolved_if = resolved_if_list[i]
-                for resolved_if in resolved_if_list[:i]:
-                    try:
-                        equals = resolved_if.condition.equals(check_resolved_if.condition)
-                    except NotImplementedError:
-                        pass
-                    else:
-                        if equals:
-                            resolved_if.block.extend(check_resolved_if.block)
-                            resolved_if_list.pop(i)
-                            break
-
-
-        resolved_block = ResolvedBlock()
-
-        if merge_sibling_increment_statements:
-            resolved_block.extend(merge_increment(increment_list))
-        else:
-            resolved_block.extend(increment_list)
-
-        for resolved_if in resolved_if_list:
-            if merge_sibling_increment_statements:
-                resolved_if.block = merge_increment(resolved_if.block)
-            else:
-                resolved_if.block = resolved_if.block
-            resolved_block.append(resolved_if)
-
-        return resolved_block
-
-    pass
-
-class ResolvedBlock(list[ResolvedIf | Increment]):
-    def eliminate_symbol_from_max_min(self, summation_index : sympy.Symbol) -> ResolvedBlock:
-        return ResolvedBlock(resolved_statement for temp_resolved_statement in self for resolved_statement in temp_resolved_statement.eliminate_symbol_from_max_min(summation_index))
-
-    def cse(self) -> CSEBlock:
-        expressions : list[typing.Any] = []
-
-        result_symbols : set[sympy.Symbol] = set()
-
-        for statement in self:
-            if isinstance(statement, ResolvedIf):
-                expressions.append(statement.condition)
-                for increment in statement.block:
-                    expressions.append(increment.expression)
-                    result_symbols.add(increment.symbol)
-            else:
-                expressions.append(statement.expression)
-                result_symbols.add(statement.symbol)
-
-        replacements, reduced_expressions = sympy.cse(expressions)
-        assert isinstance(reduced_expressions, list)
-
-        return_block = CSEBlock()
-        return_block.extend(Assignment(result_symbol, 0) for result_symbol in result_symbols)
-
-        if evaluate_common_subexpressions:
-            return_block.extend(Assignment(replacement[0], replacement[1]) for replacement in replacements)
-
-            for statement in self:
-                if isinstance(statement, ResolvedIf):
-                    resolved_condition = reduced_expressions.pop(0)
-                    assert isinstance(resolved_condition, ResolvedIf.Union), f"resolved condition is of unexpected type {type(resolved_condition)}"
-                    new_if = ResolvedIf.from_condition(resolved_condition, [Increment(increment.symbol, reduced_expressions.pop(0)) for increment in statement.block])
-                    return_block.extend(new_if)
-                else:
-                    return_block.append(Increment(statement.symbol, reduced_expressions.pop(0)))
-        else:
-            return_block.extend(self)
-
-        return return_block
-
-    pass
-
-class CSEBlock(list[ResolvedIf | Increment| Assignment]):
-    def dump_python(self) -> str:
-        return_string = ""
-
-        for statement in self:
-            if isinstance(statement, Increment):
-                return_string += f"{sympy.pycode(statement.symbol)} += {sympy.pycode(statement.expression)}\n"
-
-            elif isinstance(statement, ResolvedIf):
-                return_string += f"if {sympy.pycode(statement.condition)}:\n"
-                for increment in statement.block:
-                    return_string += f"    {sympy.pycode(increment.symbol)} += {sympy.pycode(increment.expression)}\n"
-
-            elif isinstance(statement, Assignment):
-                return_string += f"{sympy.pycode(statement.symbol)} = {sympy.pycode(statement.expr)}\n"
-  
-            else:
-                raise Exception(f"unexpected statement {statement}")
-
-        return return_string
-
-    def dump_cpp(self, integer_type : str = "long long", force_braces : bool = False, beginning_brace_on_same_line : bool = False) -> str:
-        return_string = ""
-
-        for statement in self:
-            if isinstance(statement, Increment):
-                return_string += f"{sympy.cxxcode(statement.symbol)} += {sympy.cxxcode(statement.expression)};\n"
-
-            elif isinstance(statement, ResolvedIf):
-                return_string += f"if ({sympy.cxxcode(statement.condition)})"
-                if len(statement.block) != 1 or force_braces:
-                    if beginning_brace_on_same_line:
-                        return_string += " "
-                    else:
-                        return_string += "\n"
-                    return_string += "{"
-                return_string += "\n"
-                for increment in statement.block:
-                    return_string += f"    {sympy.cxxcode(increment.symbol)} += {sympy.cxxcode(increment.expression)};\n"
-                if len(statement.block) != 1 or force_braces:
-                    return_string += "}\n"
-
-            elif isinstance(statement, Assignment):
-                return_string += f"{integer_type} {sympy.cxxcode(statement.expr, statement.symbol)}\n"
-  
-            else:
-                raise Exception(f"unexpected statement {statement}")
-
-        return return_string
-
-    pass
-
-
-class Python:
-    @staticmethod
-    def _parse_block(stmts : list[ast.stmt], sympy_local_dict : dict[str, sympy.Symbol] | None, sum_indices : set[sympy.Symbol],
-                     results : set[sympy.Symbol], constants : dict[sympy.Symbol, typing.Any]) -> StatementBlock:
-        
-        sum_indices = sum_indices.copy()
-        results = results.copy()
-        constants = constants.copy()
-        
-        return_block = StatementBlock()
-        for stmt in stmts:
-
-            if isinstance(stmt, ast.If):
-                condition_string = ast.unparse(stmt.test).replace("&&", "&").replace("||", "|")
-
-                condition = sympy.parse_expr(condition_string, sympy_local_dict).subs(constants)
-                If_ = If(condition, Python._parse_block(stmt.body, sympy_local_dict, sum_indices, results, constants))
-                return_block.append(If_)
-
-                if len(stmt.orelse) != 0:
-                    return_block.append(If_.negate(Python._parse_block(stmt.orelse, sympy_local_dict, sum_indices, results, constants)))
-
-            elif isinstance(stmt, ast.For):
-                var = stmt.target
-                assert isinstance(var, ast.Name), "the target of the for loop must be a variable"
-                sum_index = sympy.parse_expr(ast.unparse(var), sympy_local_dict)
-                assert sum_index not in sum_indices, f"can't assign to a summation index at line {stmt.lineno}: '{ast.unparse(stmt)}'"
-                assert sum_index not in constants, f"can't reassign to this constant at line {stmt.lineno}: '{ast.unparse(stmt)}'"
-                assert sum_index not in results, f"can't reassign to this result at line {stmt.lineno}: '{ast.unparse(stmt)}'"
-                sum_indices.add(sum_index)
-
-                rng = stmt.iter
-                assert isinstance(rng, ast.Call), "the expression must be a function call"
-                assert isinstance(rng.func, ast.Name) and rng.func.id == 'range', "the function called must be 'range'"
-                assert len(rng.args) == 2, "the call to 'range' must have exactly two arguments"
-                lower = sympy.parse_expr(ast.unparse(rng.args[0]), sympy_local_dict).subs(constants)
-                upper = sympy.parse_expr(ast.unparse(rng.args[1]), sympy_local_dict).subs(constants)
-                
-                lt : typing.Any = sympy.LessThan(lower, sum_index)
-                slt : typing.Any = sympy.StrictLessThan(sum_index, upper)
-                assert isinstance(lt, Inequality) and isinstance(slt, Inequality), f"range must be a range but is {lt} and {slt}"
-                
-                return_block.append(For(sum_index, [lt, slt], Python._parse_block(stmt.body, sympy_local_dict, sum_indices, results, constants)))
-
-            elif isinstance(stmt, ast.Assign):  # =
-                assert len(stmt.targets) == 1, "can only assign to one variable at a time"
-
-                target = stmt.targets[0]
-                assert isinstance(target, ast.Name), "the target of the for loop must be a variable"
-
-                symbol = sympy.parse_expr(ast.unparse(target), sympy_local_dict)
-                assert symbol not in sum_indices, f"can't assign to a summation index at line {stmt.lineno}: '{ast.unparse(stmt)}'"
-                assert symbol not in constants, f"can't reassign to this constant at line {stmt.lineno}: '{ast.unparse(stmt)}'"
-                assert symbol not in results, f"can't reassign to this result at line {stmt.lineno}: '{ast.unparse(stmt)}'"
-
-                expression = sympy.parse_expr(ast.unparse(stmt.value), sympy_local_dict).subs(constants)
-                constants[symbol] = expression
-
-            elif isinstance(stmt, ast.AugAssign): # +=
-                assert isinstance(stmt.op, ast.Add)
-                assert isinstance(stmt.target, ast.Name), "the target of the for loop must be a variable"
-
-                result_symbol = sympy.parse_expr(ast.unparse(stmt.target), sympy_local_dict)
-                assert result_symbol not in sum_indices, f"can't assign to a summation index at line {stmt.lineno}: '{ast.unparse(stmt)}'"
-                assert result_symbol not in constants, f"can't increment this constant at line {stmt.lineno}: '{ast.unparse(stmt)}'"
-                results.add(result_symbol)
-
-                expression = sympy.parse_expr(ast.unparse(stmt.value), sympy_local_dict).subs(constants)
-
-                return_block.append(Increment(result_symbol, expression))
-
-            elif isinstance(stmt, ast.Pass):
-                pass
-
-            else:
-                raise Exception(f"unknown statement at line {stmt.lineno}: '{ast.unparse(stmt)}'")
-
-            pass
-        
-        return return_block
-
-    @staticmethod
-    def parse(string : str, sympy_local_dict : dict[str, sympy.Symbol] | None = None) -> StatementBlock:
-        return Python._parse_block(ast.parse(string).body, sympy_local_dict, set(), set(), dict())
-
-    pass
-
-if __name__ == "__main__":
-    python_string = """
-for x in range(a + 1, b + 1):
-    if c < x:
-        r += 2
-    if c < x:
-        # r += x + 1
-        # r2 += 2 + x
-        # r += 3*x + 7
-        # if c < y:
-        #     k = y * 7
-        #     r += max(k, x + 1)
-        #     r += k
-             for z in range(q + 1, max(500, x + 1)):
-        #     #for z in range(q + 1, x + 1):
-                 r += 5
-    # else:
-        #r 2 += x * 10
-        # r += x * 2
-    """
-    
-    python_string = """
-#for i in range(min0, min(UPPER, SUM) + 1):
-
-#SUM_i = SUM - i
-#for j in range(min1, min(UPPER, SUM_i) + 1):
-
-SUM_i_j = SUM_i - j
-for k in range(min2, min(UPPER, SUM_i_j) + 1):
-    SUM_i_j_k = SUM_i_j - k
-    for l in range(min3, min(UPPER, SUM_i_j_k) + 1):
-        SUM_i_j_k_l = SUM_i_j_k - l
-        m = SUM_i_j_k_l
-        if (min4 <= m) & (m <= UPPER):
-            result += 1
-    """
-
-    cse = Python.parse(python_string).resolve().cse()
-    print()
-    print(f"python:\n{cse.dump_python()}")
-    #print(f"c++:\n{cse.dump_cpp()}")
+from __future__ import annotations
+import typing, ast, collections, time, textwrap, math, functools, itertools, threading, contextlib, json, sys, os, pathlib, hashlib, argparse, socketserver, concurrent.futures, inspect
+import sympy, sympy.logic.boolalg as boolalg, sympy.core, sympy.core.relational, sympy.core.numbers, sympy.core.add, sympy.core.operations
+
+
+Inequality = sympy.GreaterThan | sympy.LessThan | sympy.StrictGreaterThan | sympy.StrictLessThan
+In_Equality = Inequality | sympy.Equality
+Statement = typing.Union["Increment", "If", "For"]
+
+
+class BudgetExceeded(Exception):
+    """raised when the resolution of a loop level exceeds the time or branch budget"""
+    pass
+
+class Budget:
+    """tracks the time and branch budget of a transformation and records where it ran out"""
+    def __init__(self, time_limit : float | None = None, branch_limit : int | None = None):
+        self.time_limit = time_limit
+        self.branch_limit = branch_limit
+        self.start_time = time.perf_counter()
+        """set again by start when the outermost StatementBlock.resolve begins"""
+        self.report : list[str] = []
+        """one entry per loop level which was kept as a loop"""
+        return
+
+    def start(self) -> None:
+        self.start_time = time.perf_counter()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start_time
+
+    def check_time(self) -> None:
+        if self.time_limit is not None and self.elapsed() > self.time_limit:
+            raise BudgetExceeded(f"time budget of {self.time_limit}s exceeded after {self.elapsed():.1f}s")
+
+    def check_branches(self, branches : int) -> None:
+        if self.branch_limit is not None and branches > self.branch_limit:
+            raise BudgetExceeded(f"branch budget of {self.branch_limit} exceeded by {branches} branches")
+
+    def check(self, branches : int) -> None:
+        self.check_time()
+        self.check_branches(branches)
+
+    pass
+
+class TransformCache:
+    """
+    thread safe cache which can be shared by several transformations
+    if it holds more than max_entries entries the least recently used ones are evicted
+    """
+    def __init__(self, max_entries : int | None = None):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries : collections.OrderedDict[typing.Hashable, typing.Any] = collections.OrderedDict()
+        return
+
+    def get(self, key : typing.Hashable, default : typing.Any = None) -> typing.Any:
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key : typing.Hashable, value : typing.Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while self.max_entries is not None and len(self._entries) > self.max_entries:
+                self._entries.popitem(last = False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    pass
+
+class TransformContext:
+    """
+    settings, caches and metrics of a single transformation, pass it to Python.parse, resolve and cse
+    transformations running at the same time need their own context but may share a TransformCache
+    """
+    backends = ("splitting", "polyhedral")
+    """the values of the backend setting"""
+
+    def __init__(self, print_info : bool = False, simplify_increment_expression : bool = False, simplify_condition : bool = False,
+                 simplify_dnf : bool = True, merge_sibling_increment_statements : bool = True, conjoin_sibling_if_statements : bool = True,
+                 evaluate_common_subexpressions : bool = True, time_budget : float | None = None, branch_budget : int | None = None,
+                 reorder_max_min_splitting : bool = True, prune_infeasible_splits : bool = True, tighten_loop_bounds : bool = False,
+                 count_compositions : bool = True, backend : str = "splitting", exploit_symmetries : bool = True,
+                 decision_diagrams : bool = True, remove_redundant_inequalities : bool = True, merge_identical_branches : bool = True,
+                 sympy_simplify : bool = False, cse_chunk_size : int | None = None, cse_processes : int = 1, checkpoint_dir : str | None = None,
+                 cache_subtrees : bool = False, cache : TransformCache | None = None):
+        if backend not in TransformContext.backends:
+            raise ValueError(f"backend must be one of {', '.join(TransformContext.backends)} but is {backend!r}")
+
+        self.print_info = print_info
+        """print debug info to the terminal (in ResolvedIf.eliminate_symbol_from_max_min and Increment.eliminate_symbol_from_max_min)"""
+        self.simplify_increment_expression = simplify_increment_expression
+        """simplify the increment expression passed to Increment.__init__"""
+        self.simplify_condition = simplify_condition
+        """simplify the condition passed to If.__init__ and ResolvedIf.from_condition"""
+        self.sympy_simplify = sympy_simplify
+        """simplify conditions with sympy's simplify instead of LinearSystem.simplify, which only normalizes conjunctions of linear inequalities but is much faster (in Increment.eliminate_symbol_from_max_min, If.__init__ and ResolvedIf.from_condition)"""
+        self.simplify_dnf = simplify_dnf
+        """force sympy.to_dnf to simplify its result (in If.resolve, only without decision_diagrams)"""
+        self.decision_diagrams = decision_diagrams
+        """split conditions into mutually exclusive conjunctions along the paths of a binary decision diagram instead of sympy.to_dnf (in If.resolve)"""
+        self.remove_redundant_inequalities = remove_redundant_inequalities
+        """drop the inequalities of a condition implied by the others and drop contradicting conditions (in For._resolve and ResolvedBlock.cse)"""
+        self.merge_identical_branches = merge_identical_branches
+        """merge branches with the same increments into one branch if the union of their conditions is a conjunction, otherwise guard them by a disjunction (in ResolvedBlock.cse)"""
+        self.merge_sibling_increment_statements = merge_sibling_increment_statements
+        """merge two increment statements if they have the same symbol (in StatementBlock.resolve)"""
+        self.conjoin_sibling_if_statements = conjoin_sibling_if_statements
+        """merge two sibling if clauses if they have the same condition (in StatementBlock.resolve)"""
+        self.evaluate_common_subexpressions = evaluate_common_subexpressions
+        """identify common subexpressions, collect them and evaluate them at once (in ResolvedBlock.cse)"""
+        self.cse_chunk_size = cse_chunk_size
+        """eliminate common subexpressions in chunks of this many expressions and merge the temporaries of the chunks, None eliminates them in all expressions of a block at once (in ResolvedBlock.cse)"""
+        self.cse_processes = cse_processes
+        """number of processes eliminating the common subexpressions of the chunks in parallel, doesn't affect the result (in ResolvedBlock.cse)"""
+        self.reorder_max_min_splitting = reorder_max_min_splitting
+        """split the max/min with the fewest branches first and reuse orderings derived for the same arguments (in SympyMaxMinSplitter.split)"""
+        self.prune_infeasible_splits = prune_infeasible_splits
+        """drop a branch as soon as its inequalities contradict each other instead of splitting it further (in SympyMaxMinSplitter.split)"""
+        self.tighten_loop_bounds = tighten_loop_bounds
+        """keep the loops but fold the conditions of their bodies into their bounds, so every iteration increments (in For.resolve)"""
+        self.count_compositions = count_compositions
+        """count bounded compositions (loops over the parts of a sum) with binomial coefficients instead of splitting max/min (in For.resolve)"""
+        self.backend = backend
+        """the engine, "splitting" resolves loop by loop and splits max/min, "polyhedral" counts the lattice points of the polyhedron of a whole loop nest (in For.resolve)"""
+        self.exploit_symmetries = exploit_symmetries
+        """resolve a block whose result doesn't change if some parameters are permuted only for sorted parameters and substitute their order statistics (in StatementBlock.resolve)"""
+        self.budget = Budget(time_budget, branch_budget)
+        """maximum wall time in seconds since the outermost StatementBlock.resolve began and number of branches per loop level, None means unlimited (in For.resolve and SympyMaxMinSplitter.split)"""
+        self.cache = cache if cache is not None else TransformCache()
+        """results which can be reused (e.g. summations in Increment.summation)"""
+        self.cache_subtrees = cache_subtrees
+        """cache the resolved block of every For, If and StatementBlock by its subtree, the settings and the assumptions, so a transformation sharing the cache only resolves the changed levels of a nest again, bound the memory with TransformCache.max_entries (in resolve_cached)"""
+        self.checkpoints = Checkpoints(checkpoint_dir) if checkpoint_dir is not None else None
+        """resolved loop levels saved to checkpoint_dir, an interrupted transformation continues from the deepest saved level (in For.resolve)"""
+        self.metrics : dict[str, float] = {}
+        """counters and accumulated times of the phases"""
+        self.timers : set[str] = set()
+        """the metrics which are times (accumulated by timed), the others are counters"""
+        self.assumptions = LinearSystem()
+        """inequalities between the parameters which hold while a block is resolved, branches contradicting them are dropped (set in StatementBlock.resolve)"""
+        self.resolve_depth = 0
+        """number of StatementBlock.resolve calls in progress, symmetries are only detected in the outermost one"""
+        self._metrics_lock = threading.Lock()
+        return
+
+    @staticmethod
+    def check_settings(settings : dict[str, typing.Any]) -> None:
+        """raises a TypeError or ValueError unless settings are arguments of TransformContext (except cache) of their annotated types"""
+        parameters = inspect.signature(TransformContext).parameters
+        checks : dict[str, typing.Callable[[typing.Any], bool]] = {
+            "bool" : lambda value: isinstance(value, bool),
+            "int" : lambda value: isinstance(value, int) and not isinstance(value, bool),
+            "float" : lambda value: isinstance(value, int | float) and not isinstance(value, bool),
+            "str" : lambda value: isinstance(value, str),
+            "None" : lambda value: value is None,
+        }
+        for name, value in settings.items():
+            if name not in parameters or name == "cache":
+                raise TypeError(f"unknown setting '{name}'")
+            # the annotations are strings because of the postponed evaluation of annotations
+            annotation = str(parameters[name].annotation)
+            if not any(checks[type_name](value) for type_name in annotation.split(" | ")):
+                raise TypeError(f"setting '{name}' must be of type {annotation} but is {value!r}")
+        if settings.get("backend", "splitting") not in TransformContext.backends:
+            raise ValueError(f"backend must be one of {', '.join(TransformContext.backends)} but is {settings['backend']!r}")
+
+    def settings(self) -> dict[str, typing.Any]:
+        """
+        the settings which affect the result
+        the budgets aren't included, only results resolved within them are cached, so a retry with larger budgets reuses them
+        """
+        return {
+            "simplify_increment_expression" : self.simplify_increment_expression,
+            "simplify_condition" : self.simplify_condition,
+            "simplify_dnf" : self.simplify_dnf,
+            "sympy_simplify" : self.sympy_simplify,
+            "merge_sibling_increment_statements" : self.merge_sibling_increment_statements,
+            "conjoin_sibling_if_statements" : self.conjoin_sibling_if_statements,
+            "evaluate_common_subexpressions" : self.evaluate_common_subexpressions,
+            "cse_chunk_size" : self.cse_chunk_size,
+            "reorder_max_min_splitting" : self.reorder_max_min_splitting,
+            "prune_infeasible_splits" : self.prune_infeasible_splits,
+            "tighten_loop_bounds" : self.tighten_loop_bounds,
+            "count_compositions" : self.count_compositions,
+            "backend" : self.backend,
+            "exploit_symmetries" : self.exploit_symmetries,
+            "decision_diagrams" : self.decision_diagrams,
+            "remove_redundant_inequalities" : self.remove_redundant_inequalities,
+            "merge_identical_branches" : self.merge_identical_branches,
+        }
+
+    def resolve_cached(self, statement : For | If | StatementBlock, resolve : typing.Callable[[], ResolvedBlock]) -> ResolvedBlock:
+        """
+        the resolved block of statement from the cache or from resolve, which is cached unless a budget ran out
+        the key is the subtree of statement together with everything else the result depends on: the settings and the assumptions
+        """
+        if not self.cache_subtrees:
+            return resolve()
+
+        key = ("resolved", statement.subtree_key(), tuple(self.settings().items()), self.assumptions.rows)
+        cached : tuple[ResolvedBlock, dict[str, float]] | None = self.cache.get(key)
+        if cached is not None:
+            # replay the counters (branches, split cases, ...) of the resolution, the time it took isn't spent again
+            resolved_block, counters = cached
+            self.count("subtree cache hits")
+            for name, value in counters.items():
+                self.count(name, value)
+            return resolved_block.copy()
+
+        report_length = len(self.budget.report)
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+        resolved_block = resolve()
+        if len(self.budget.report) == report_length:
+            with self._metrics_lock:
+                counters = {name : value - metrics.get(name, 0) for name, value in self.metrics.items()
+                            if name not in self.timers and name != "subtree cache hits" and value != metrics.get(name, 0)}
+            # the callers conjoin the blocks of the returned if statements in place
+            self.cache.set(key, (resolved_block.copy(), counters))
+        return resolved_block
+
+    def count(self, name : str, value : float = 1) -> None:
+        with self._metrics_lock:
+            self.metrics[name] = self.metrics.get(name, 0) + value
+
+    @contextlib.contextmanager
+    def timed(self, name : str) -> typing.Iterator[None]:
+        """accumulate the time spent in the with statement as metric `name` (in seconds)"""
+        self.timers.add(name)
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.count(name, time.perf_counter() - start_time)
+
+    def info(self, message : str) -> None:
+        if self.print_info:
+            print(message)
+
+    pass
+
+
+Row = tuple[tuple[tuple[sympy.Symbol, int], ...], int]
+"""a linear inequality `sum(coefficient * symbol) + constant <= 0` with integer coefficients"""
+
+class LinearSystem:
+    """
+    conjunction of linear inequalities over the integers
+    detects contradicting and implied inequalities by Fourier-Motzkin elimination, relationals which aren't linear are ignored
+    """
+    max_rows = 256
+    """give up (and assume feasibility) if the elimination produces more rows than this"""
+
+    def __init__(self, rows : typing.Iterable[Row] = ()):
+        self.rows = frozenset(rows)
+        return
+
+    @staticmethod
+    def _row(expression : typing.Any, strict : bool) -> typing.Optional[Row]:
+        """`expression <= 0` (or `expression < 0` if strict) as a row, None if the expression isn't linear"""
+        constant : typing.Any = sympy.Integer(0)
+        coefficients : dict[sympy.Symbol, typing.Any] = {}
+        for term, coefficient in sympy.expand(expression).as_coefficients_dict().items():
+            if not coefficient.is_Rational:
+                return None
+            if term == 1:
+                constant = coefficient
+            elif isinstance(term, sympy.Symbol):
+                coefficients[term] = coefficient
+            else:
+                return None
+
+        scale = math.lcm(constant.q, *(coefficient.q for coefficient in coefficients.values()))
+        return LinearSystem._normalize({symbol : int(coefficient * scale) for symbol, coefficient in coefficients.items()}, int(constant * scale) + strict)
+
+    @staticmethod
+    def _normalize(coefficients : dict[sympy.Symbol, int], constant : int) -> Row:
+        """divide by the greatest common divisor of the coefficients and round the constant up (sum(a*x) <= -c implies sum(a/g*x) <= floor(-c/g))"""
+        coefficients = {symbol : coefficient for symbol, coefficient in coefficients.items() if coefficient != 0}
+        divisor = math.gcd(*coefficients.values())
+        if divisor > 1:
+            coefficients = {symbol : coefficient // divisor for symbol, coefficient in coefficients.items()}
+            constant = -(-constant // divisor)
+        return tuple(sorted(coefficients.items(), key = lambda item: item[0].name)), constant
+
+    @staticmethod
+    def negate_row(row : Row) -> Row:
+        """not (e <= 0) <=> -e + 1 <= 0 over the integers"""
+        coefficients, constant = row
+        return tuple((symbol, -coefficient) for symbol, coefficient in coefficients), 1 - constant
+
+    @staticmethod
+    def rows(relational : typing.Any) -> typing.Optional[list[Row]]:
+        """the rows whose conjunction is equivalent to the relational, None if it isn't a linear (in)equality"""
+        if not isinstance(relational, In_Equality):
+            return None
+
+        difference = relational.lhs - relational.rhs
+        if relational.rel_op == "==":
+            rows = [LinearSystem._row(difference, False), LinearSystem._row(-difference, False)]
+        elif relational.rel_op in ("<", "<="):
+            rows = [LinearSystem._row(difference, relational.rel_op == "<")]
+        else:
+            rows = [LinearSystem._row(-difference, relational.rel_op == ">")]
+
+        if any(row is None for row in rows):
+            return None
+        return typing.cast(list[Row], rows)
+
+    def add(self, rows : typing.Iterable[Row]) -> LinearSystem:
+        return LinearSystem(self.rows.union(rows))
+
+    def add_condition(self, condition : typing.Any) -> LinearSystem:
+        """add the linear conjuncts of a condition, everything else is ignored"""
+        conjuncts = condition.args if isinstance(condition, sympy.And) else (condition, )
+        rows = [row for conjunct in conjuncts for row in LinearSystem.rows(conjunct) or []]
+        return self.add(rows)
+
+    @staticmethod
+    def relational(q : typing.Any) -> In_Equality:
+        """q <= 0 with the negative terms on the right hand side"""
+        terms = sympy.Add.make_args(q)
+        constant = sum(term for term in terms if term.is_number)
+        lhs = sympy.Add(*(term for term in terms if not term.is_number and not term.could_extract_minus_sign()))
+        rhs = -sympy.Add(*(term for term in terms if not term.is_number and term.could_extract_minus_sign()))
+        if constant > 0:
+            return sympy.StrictLessThan(lhs + constant - 1, rhs)
+        return sympy.LessThan(lhs, rhs - constant)
+
+    @staticmethod
+    def simplify(condition : typing.Any) -> typing.Any:
+        """
+        a conjunction without duplicates and constant conjuncts, false if two of its linear inequalities contradict each other, other conditions are returned unchanged
+        of the inequalities whose rows differ only in the constant (strict ones are tightened to `e + 1 <= 0`) only the tightest is kept
+        an inequality with a symbol on both sides which cancels out is rewritten from its row
+        """
+        if not isinstance(condition, sympy.And | In_Equality):
+            return condition
+
+        kept : dict[typing.Hashable, tuple[int | None, typing.Any]] = {}
+        """per row without its constant the largest constant and its conjunct, per other conjunct None and itself"""
+        bounds : dict[tuple[tuple[sympy.Symbol, int], ...], int] = {}
+        """the largest constant per row without its constant, including the rows of equalities"""
+        for conjunct in condition.args if isinstance(condition, sympy.And) else (condition, ):
+            rows = LinearSystem.rows(conjunct)
+            for coefficients, constant in rows or []:
+                if not coefficients and constant > 0:
+                    return sympy.false
+                bounds[coefficients] = max(constant, bounds.get(coefficients, constant))
+            if rows is None or len(rows) != 1:
+                kept.setdefault(conjunct, (None, conjunct))
+            elif rows[0][0]:
+                coefficients, constant = rows[0]
+                if len(coefficients) != len(conjunct.free_symbols):
+                    conjunct = LinearSystem.relational(sympy.Add(*(coefficient * symbol for symbol, coefficient in coefficients), constant))
+                if coefficients not in kept or constant > typing.cast(int, kept[coefficients][0]):
+                    kept[coefficients] = (constant, conjunct)
+
+        # e + c <= 0 and -e + d <= 0 contradict each other if -d < -c
+        if any(bounds.get(tuple((symbol, -coefficient) for symbol, coefficient in coefficients), -constant) + constant > 0 for coefficients, constant in bounds.items()):
+            return sympy.false
+        return sympy.And(*(conjunct for _, conjunct in kept.values()))
+
+    def is_feasible(self) -> bool:
+        """False if the inequalities contradict each other, True if they don't or if it can't be decided"""
+        return LinearSystem._is_feasible(self.rows)
+
+    def add_relationals(self, relationals : typing.Iterable[typing.Any]) -> LinearSystem:
+        """add the linear relationals, everything else is ignored"""
+        return self.add(row for relational in relationals for row in LinearSystem.rows(relational) or [])
+
+    def irredundant(self, relationals : list[typing.Any]) -> list[typing.Any] | None:
+        """
+        the relationals without those implied by the remaining ones (and self), None if they contradict each other
+        every max/min is replaced by a symbol which is at least (most) each of its arguments, so relationals containing them are compared too
+        """
+        system, abstracted = self._abstract(relationals)
+        if not system.add_relationals(abstracted).is_feasible():
+            return None
+        kept = list(range(len(relationals)))
+        for i in range(len(relationals)):
+            others = [j for j in kept if j != i]
+            if system.add_relationals(abstracted[j] for j in others).implies(abstracted[i]):
+                kept = others
+        return [relationals[i] for i in kept]
+
+    def contradicts(self, relationals : list[typing.Any]) -> bool:
+        """True if the relationals (and self) contradict each other, max/min are replaced like in irredundant"""
+        system, abstracted = self._abstract(relationals)
+        return not system.add_relationals(abstracted).is_feasible()
+
+    def _abstract(self, relationals : list[typing.Any]) -> tuple[LinearSystem, list[typing.Any]]:
+        """self with the bounds of a new symbol per max/min and the relationals with the max/min replaced by these symbols"""
+        opaque : dict[typing.Any, sympy.Dummy] = {}
+        for relational in relationals:
+            for term in sorted(relational.atoms(sympy.Max, sympy.Min), key = sympy.default_sort_key):
+                opaque.setdefault(term, sympy.Dummy())
+        system = self.add_relationals((sympy.GreaterThan if isinstance(term, sympy.Max) else sympy.LessThan)(symbol, argument.xreplace(opaque))
+                                      for term, symbol in opaque.items() for argument in term.args)
+        return system, [relational.xreplace(opaque) for relational in relationals]
+
+    def implies(self, relational : typing.Any) -> bool:
+        """True if the inequalities imply the relational, False if they don't or if it can't be decided"""
+        rows = LinearSystem.rows(relational)
+        if rows is None:
+            return False
+        return all(not self.add([LinearSystem.negate_row(row)]).is_feasible() for row in rows)
+
+    @staticmethod
+    @functools.lru_cache(maxsize = 1 << 16)
+    def _is_feasible(rows : frozenset[Row]) -> bool:
+        while True:
+            if any(not coefficients and constant > 0 for coefficients, constant in rows):
+                return False
+            rows = frozenset(row for row in rows if row[0])
+
+            occurrences : dict[sympy.Symbol, list[int]] = {}
+            for coefficients, _ in rows:
+                for symbol, coefficient in coefficients:
+                    occurrences.setdefault(symbol, [0, 0])[coefficient > 0] += 1
+            if not occurrences:
+                return True
+
+            # eliminate the symbol which produces the fewest new rows
+            symbol = min(occurrences, key = lambda symbol: occurrences[symbol][0] * occurrences[symbol][1] - sum(occurrences[symbol]))
+            upper : list[tuple[dict[sympy.Symbol, int], int, int]] = []
+            lower : list[tuple[dict[sympy.Symbol, int], int, int]] = []
+            new_rows : set[Row] = set()
+            for row in rows:
+                coefficients = dict(row[0])
+                coefficient = coefficients.pop(symbol, 0)
+                if coefficient > 0:
+                    upper.append((coefficients, row[1], coefficient))
+                elif coefficient < 0:
+                    lower.append((coefficients, row[1], -coefficient))
+                else:
+                    new_rows.add(row)
+
+            for upper_coefficients, upper_constant, upper_factor in upper:
+                for lower_coefficients, lower_constant, lower_factor in lower:
+                    combined = {s : lower_factor * upper_coefficients.get(s, 0) + upper_factor * lower_coefficients.get(s, 0) for s in upper_coefficients.keys() | lower_coefficients.keys()}
+                    new_rows.add(LinearSystem._normalize(combined, lower_factor * upper_constant + upper_factor * lower_constant))
+
+            if len(new_rows) > LinearSystem.max_rows:
+                return True
+            rows = frozenset(new_rows)
+
+    pass
+
+
+class DecisionDiagram:
+    """
+    reduced ordered binary decision diagram of a condition over its atomic relationals
+    a node is an int, 0 and 1 are the terminals false and true, every other node has a variable (atom), a low child (the atom doesn't hold) and a high child
+    equal subdiagrams are the same node, so and, or and not take time polynomial in the size of the diagrams
+    """
+    def __init__(self):
+        self.atoms : list[typing.Any] = []
+        """the atom of every variable, variables are ordered by their first occurrence"""
+        self._variables : dict[typing.Any, int] = {}
+        self._nodes : list[tuple[int, int, int]] = [(-1, 0, 0), (-1, 1, 1)]
+        self._unique : dict[tuple[int, int, int], int] = {}
+        self._computed : dict[tuple[str, int, int], int] = {}
+        return
+
+    @staticmethod
+    def _atom(relational : typing.Any) -> tuple[typing.Any, bool]:
+        """the atom of a relational and whether the relational is the atom (True) or its negation (False), a <= b is not b < a"""
+        if isinstance(relational, sympy.StrictLessThan):
+            return relational, True
+        if isinstance(relational, sympy.StrictGreaterThan):
+            return sympy.StrictLessThan(relational.rhs, relational.lhs, evaluate = False), True
+        if isinstance(relational, sympy.LessThan):
+            return sympy.StrictLessThan(relational.rhs, relational.lhs, evaluate = False), False
+        if isinstance(relational, sympy.GreaterThan):
+            return sympy.StrictLessThan(relational.lhs, relational.rhs, evaluate = False), False
+        if isinstance(relational, sympy.Unequality):
+            return sympy.Equality(relational.lhs, relational.rhs, evaluate = False), False
+        return relational, True
+
+    @staticmethod
+    def _literal(atom : typing.Any, positive : bool) -> typing.Any:
+        """the atom or its negation as relational"""
+        if positive:
+            return atom
+        if isinstance(atom, sympy.StrictLessThan):
+            return sympy.LessThan(atom.rhs, atom.lhs)
+        return sympy.Not(atom)
+
+    def _node(self, variable : int, low : int, high : int) -> int:
+        if low == high:
+            return low
+        key = (variable, low, high)
+        node = self._unique.get(key)
+        if node is None:
+            node = self._unique[key] = len(self._nodes)
+            self._nodes.append(key)
+        return node
+
+    def variable(self, relational : typing.Any) -> int:
+        """the diagram of a relational (or boolean symbol)"""
+        atom, positive = DecisionDiagram._atom(relational)
+        variable = self._variables.get(atom)
+        if variable is None:
+            variable = self._variables[atom] = len(self.atoms)
+            self.atoms.append(atom)
+        return self._node(variable, 0, 1) if positive else self._node(variable, 1, 0)
+
+    def apply(self, operator : str, u : int, v : int) -> int:
+        """u and v, u or v"""
+        if operator == "and":
+            if u == 0 or v == 0:
+                return 0
+            if u == 1 or u == v:
+                return v
+            if v == 1:
+                return u
+        else:
+            if u == 1 or v == 1:
+                return 1
+            if u == 0 or u == v:
+                return v
+            if v == 0:
+                return u
+
+        key = (operator, min(u, v), max(u, v))
+        node = self._computed.get(key)
+        if node is None:
+            u_variable, u_low, u_high = self._nodes[u]
+            v_variable, v_low, v_high = self._nodes[v]
+            variable = min(u_variable, v_variable)
+            if u_variable != variable:
+                u_low = u_high = u
+            if v_variable != variable:
+                v_low = v_high = v
+            node = self._computed[key] = self._node(variable, self.apply(operator, u_low, v_low), self.apply(operator, u_high, v_high))
+        return node
+
+    def negate(self, u : int) -> int:
+        if u < 2:
+            return 1 - u
+        key = ("not", u, u)
+        node = self._computed.get(key)
+        if node is None:
+            variable, low, high = self._nodes[u]
+            node = self._computed[key] = self._node(variable, self.negate(low), self.negate(high))
+        return node
+
+    def build(self, condition : typing.Any) -> int:
+        """the diagram of a boolean combination of relationals"""
+        if isinstance(condition, boolalg.BooleanTrue):
+            return 1
+        if isinstance(condition, boolalg.BooleanFalse):
+            return 0
+        if isinstance(condition, sympy.And | sympy.Or):
+            operator = "and" if isinstance(condition, sympy.And) else "or"
+            return functools.reduce(lambda u, v: self.apply(operator, u, v), (self.build(arg) for arg in condition.args))
+        if isinstance(condition, sympy.Not):
+            return self.negate(self.build(condition.args[0]))
+        if isinstance(condition, boolalg.BooleanFunction):
+            return self.build(sympy.to_nnf(condition, False))   # xor, implies, ...
+        return self.variable(condition)
+
+    def cubes(self, u : int, constraints : LinearSystem | None = None) -> list[list[typing.Any]]:
+        """
+        the paths to true as conjunctions of literals, they are mutually exclusive
+        paths whose linear literals contradict each other (or the constraints) are dropped
+        """
+        cubes : list[list[typing.Any]] = []
+        def visit(u : int, literals : list[typing.Any], constraints : LinearSystem | None) -> None:
+            if u < 2:
+                if u == 1:
+                    cubes.append(literals)
+                return
+            variable, low, high = self._nodes[u]
+            for child, positive in ((high, True), (low, False)):
+                literal = DecisionDiagram._literal(self.atoms[variable], positive)
+                child_constraints = constraints
+                if constraints is not None:
+                    child_constraints = constraints.add(LinearSystem.rows(literal) or [])
+                    if not child_constraints.is_feasible():
+                        continue
+                visit(child, literals + [literal], child_constraints)
+        visit(u, [], constraints)
+        return cubes
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    @staticmethod
+    def disjoint_conditions(condition : typing.Any, context : TransformContext | None = None) -> list[typing.Any]:
+        """mutually exclusive conjunctions of relationals whose disjunction is the condition"""
+        if context is None:
+            context = TransformContext()
+        diagram = DecisionDiagram()
+        root = diagram.build(condition)
+        context.count("decision diagram nodes", len(diagram))
+        constraints = context.assumptions if context.prune_infeasible_splits else None
+        return [sympy.And(*cube) for cube in diagram.cubes(root, constraints)]
+
+    pass
+
+
+class SympyMaxMinSplitter:
+    def __init__(self, symbols : tuple[sympy.Symbol], context : TransformContext | None = None):
+        self._symbols = symbols
+        self._context = context if context is not None else TransformContext()
+        return
+
+    def _get_args(self, expression : typing.Any) -> typing.Optional[tuple[typing.Any, list[typing.Any], list[typing.Any]]]:
+        """returns func, symbol_args, other_args"""
+        func = expression.func
+        args = list(expression.args)
+
+        other_args : list[typing.Any] = list()
+        symbol_args = [arg for arg in args if arg.has(*self._symbols) or other_args.append(arg)]
+
+        if len(symbol_args) == 0:
+            return None    # skip this instance of max/min because no symbol
+
+        return func, symbol_args, other_args
+
+    @staticmethod
+    def _replace(expression : typing.Any, func : typing.Any, required_args : list[typing.Any], removed_args : list[typing.Any]) -> typing.Any:
+        """in every max/min containing the required arguments remove the arguments which are known to be smaller (max) or greater (min)"""
+        def replace(subexpr : typing.Any) -> typing.Any:
+            if any(arg not in subexpr.args for arg in required_args):
+                return subexpr
+
+            new_args = [arg for arg in subexpr.args if arg not in removed_args]
+
+            if len(new_args) == 1:
+                return new_args[0]
+
+            return subexpr.func(*new_args)
+
+        return expression.replace(lambda expr: expr.func == func, replace)
+
+    def _select(self, expression : typing.Any) -> typing.Optional[tuple[typing.Any, list[typing.Any], list[typing.Any]]]:
+        """
+        select the next max/min to split, only innermost ones (without max/min in their symbol arguments) are candidates
+        without reorder_max_min_splitting the first one in postorder is selected,
+        otherwise the one with the fewest branches, preferring the one sharing its symbol arguments with the most other max/min
+        """
+        candidates : list[tuple[typing.Any, list[typing.Any], list[typing.Any]]] = []
+        max_min : list[typing.Any] = []
+        for subexpr in sympy.postorder_traversal(expression):
+            if subexpr.func in (sympy.Max, sympy.Min):
+                max_min.append(subexpr)
+                args = self._get_args(subexpr)
+                if args == None or any(sub.func in (sympy.Max, sympy.Min) and self._get_args(sub) != None for arg in args[1] for sub in sympy.preorder_traversal(arg)):
+                    continue
+                if not self._context.reorder_max_min_splitting:
+                    return args
+                candidates.append(args)
+
+        if not candidates:
+            return None
+
+        def cost(args : tuple[typing.Any, list[typing.Any], list[typing.Any]]) -> tuple[int, int]:
+            _, symbol_args, other_args = args
+            shared = sum(1 for subexpr in max_min if any(arg in subexpr.args for arg in symbol_args))
+            return len(symbol_args) + bool(other_args), -shared
+
+        return min(candidates, key = cost)
+
+    @staticmethod
+    def _decided(func : typing.Any, symbol_args : list[typing.Any], other_args : list[typing.Any], orderings : frozenset[tuple[typing.Any, typing.Any]]) -> typing.Optional[tuple[list[typing.Any], list[typing.Any]]]:
+        """
+        if the orderings derived so far (pairs of lesser and greater argument) already determine the result of the max/min,
+        returns the required and removed arguments for _replace
+        """
+        def dominates(target : typing.Any, arg : typing.Any) -> bool:
+            return ((arg, target) if func == sympy.Max else (target, arg)) in orderings
+
+        args = symbol_args + other_args
+        for target_arg in symbol_args:
+            if all(dominates(target_arg, arg) for arg in args if arg != target_arg):
+                return [target_arg], [arg for arg in args if arg != target_arg]
+
+        if other_args and all(dominates(func(*other_args), arg) for arg in symbol_args):
+            return other_args, symbol_args
+
+        return None
+
+    @staticmethod
+    def _constrain(constraints : LinearSystem | None, inequalities : list[Inequality]) -> tuple[bool, LinearSystem | None]:
+        """add the linear inequalities to the constraints, returns whether they are still feasible"""
+        if constraints is None:
+            return True, None
+        constraints = constraints.add(row for inequality in inequalities for row in LinearSystem.rows(inequality) or [])
+        return constraints.is_feasible(), constraints
+
+    def iter_split(self, expression : typing.Any, inequalities : list[Inequality] = [], constraints : LinearSystem | None = None) -> typing.Iterator[tuple[list[Inequality], typing.Any]]:
+        """
+        yields the cases (inequalities, expression without max/min of the symbols) one after another
+        constraints are the linear inequalities known to hold (including the inequalities),
+        cases contradicting them are pruned as early as possible, None disables pruning
+        """
+        # depth first worklist of expression, inequalities, orderings (pairs of lesser and greater argument) and constraints
+        worklist : list[tuple[typing.Any, list[Inequality], frozenset[tuple[typing.Any, typing.Any]], LinearSystem | None]] = [(expression, inequalities, frozenset(), constraints)]
+        cases = 0
+
+        while worklist:
+            self._context.budget.check_time()
+
+            expression, inequalities, orderings, constraints = worklist.pop()
+
+            args = self._select(expression)
+            if args == None:
+                cases += 1
+                self._context.budget.check_branches(cases)
+                yield inequalities, expression
+                continue
+
+            func, symbol_args, other_args = args
+
+            # reuse an ordering derived for the same arguments before
+            decided = self._decided(func, symbol_args, other_args, orderings) if self._context.reorder_max_min_splitting else None
+            if decided != None:
+                worklist.append((self._replace(expression, func, *decided), inequalities, orderings, constraints))
+                continue
+
+            branches : list[tuple[typing.Any, list[Inequality], frozenset[tuple[typing.Any, typing.Any]], LinearSystem | None]] = []
+            for i, target_arg in enumerate(symbol_args):
+                left_args = symbol_args[:i]
+                right_args = symbol_args[i+1:] + other_args
+
+                new_expression = self._replace(expression, func, [target_arg], left_args + right_args)
+
+                if func == sympy.Max:
+                    # target >= left -> left <= target
+                    new_inequalities = [sympy.LessThan(arg, target_arg) for arg in left_args]
+                    # target > right -> right < target
+                    new_inequalities += [sympy.StrictLessThan(arg, target_arg) for arg in right_args]
+                    new_orderings = orderings.union((arg, target_arg) for arg in left_args + right_args)
+                else:
+                    # target <= left
+                    new_inequalities = [sympy.LessThan(target_arg, arg) for arg in left_args]
+                    # target < right
+                    new_inequalities += [sympy.StrictLessThan(target_arg, arg) for arg in right_args]
+                    new_orderings = orderings.union((target_arg, arg) for arg in left_args + right_args)
+
+                feasible, new_constraints = self._constrain(constraints, new_inequalities)
+                if feasible:
+                    branches.append((new_expression, inequalities + new_inequalities, new_orderings, new_constraints))
+
+            if other_args:
+                left_args = symbol_args
+                target_arg = func(*other_args)
+
+                new_expression = self._replace(expression, func, other_args, left_args)
+
+                if func == sympy.Max:
+                    new_inequalities = [sympy.LessThan(arg, target_arg) for arg in left_args]
+                    new_orderings = orderings.union((arg, target_arg) for arg in left_args)
+                else:
+                    new_inequalities = [sympy.LessThan(target_arg, arg) for arg in left_args]
+                    new_orderings = orderings.union((target_arg, arg) for arg in left_args)
+
+                feasible, new_constraints = self._constrain(constraints, new_inequalities)
+                if feasible:
+                    branches.append((new_expression, inequalities + new_inequalities, new_orderings, new_constraints))
+
+            # reversed so that the cases are yielded in the order of the arguments
+            worklist.extend(reversed(branches))
+
+    def split(self, expression : typing.Any, inequalities : list[Inequality] = [], constraints : LinearSystem | None = None) -> list[tuple[list[Inequality], typing.Any]]:
+        return list(self.iter_split(expression, inequalities, constraints))
+
+    pass
+
+
+def is_in_equality_tuple(val: tuple[sympy.Basic, ...]) -> typing.TypeGuard[tuple[In_Equality, ...]]:
+    return all(isinstance(x, In_Equality) for x in val)
+def is_in_equality_or_symbol_tuple(val: tuple[sympy.Basic, ...]) -> typing.TypeGuard[tuple[In_Equality | sympy.Symbol, ...]]:
+    return all(isinstance(x, In_Equality | sympy.Symbol) for x in val)
+
+def find_closing(s : str, opening : str = "(", closing : str = ")") -> tuple[int, int]:
+    """
+    find the first instance of the opening sign and the corresponding closing sign
+    returns (-1, -1) on failure
+    """
+    opening_index = s.find(opening)
+    if opening_index == -1:
+        return -1, -1
+
+    count = 0
+    for i in range(opening_index, len(s)):
+        char = s[i]
+        if char == opening:
+            count += 1
+        elif char == closing:
+            count -= 1
+        if count == 0:
+            return opening_index, i
+
+    return -1, -1
+
+
+class Binomial(sympy.Function):
+    """binomial coefficient of integers, 0 if the upper argument is negative, printed as exact integer arithmetic"""
+    nargs = 2
+
+    @classmethod
+    def eval(cls, n : typing.Any, k : typing.Any) -> typing.Any:
+        if n.is_Integer and k.is_Integer:
+            return sympy.Integer(math.comb(int(n), int(k)) if n >= 0 else 0)
+        return None
+
+    def _pythoncode(self, printer : typing.Any) -> str:
+        n, k = (printer._print(arg) for arg in self.args)
+        return f"(math.comb({n}, {k}) if {n} >= 0 else 0)"
+
+    def _cxxcode(self, printer : typing.Any) -> str:
+        # the product of k consecutive integers is divisible by k!
+        n, k = self.args
+        assert k.is_Integer, f"lower argument must be an integer but is {k}"
+        n = printer._print(n)
+        product = "*".join(f"({n} - {i})" if i else f"({n})" for i in range(int(k)))
+        return f"({n} >= {k} ? {product}/{math.factorial(int(k))} : 0)" if k > 0 else f"({n} >= 0 ? 1 : 0)"
+
+    pass
+
+class Assignment:
+    __slots__ = ("symbol", "expr")
+
+    def __init__(self, symbol : sympy.Symbol, expr : typing.Any):
+        self.symbol = symbol
+        self.expr = expr
+        return
+
+    pass
+
+class Increment:
+    __slots__ = ("symbol", "expression")
+
+    def __init__(self, symbol : sympy.Symbol, expression : typing.Any, context : TransformContext | None = None):
+        self.symbol = symbol
+        if context is not None and context.simplify_increment_expression:
+            expression = expression.simplify()
+        self.expression = expression
+        return
+
+    def subtree_key(self) -> tuple[typing.Any, ...]:
+        return ("increment", self.symbol, self.expression)
+
+    def resolve(self, context : TransformContext | None = None) -> ResolvedBlock:
+        """identity"""
+        return ResolvedBlock([self])
+
+    def eliminate_symbol_from_max_min(self, summation_index : sympy.Symbol, additional_condition : ResolvedIf.Union = sympy.true, context : TransformContext | None = None) -> ResolvedBlock:
+        return ResolvedBlock(self.iter_eliminate_symbol_from_max_min(summation_index, additional_condition, context))
+
+    def iter_eliminate_symbol_from_max_min(self, summation_index : sympy.Symbol, additional_condition : ResolvedIf.Union = sympy.true, context : TransformContext | None = None) -> typing.Iterator[ResolvedIf | Increment]:
+        """yields the branches one case after another"""
+        if context is None:
+            context = TransformContext()
+
+        split_result : typing.Iterable[tuple[list[Inequality], typing.Any]]
+        if context.prune_infeasible_splits:
+            # the cases depend on the additional condition, consume them as they are produced instead of caching them
+            context.info(f"splitting Increment by {summation_index}: {self.expression}")
+            split_result = SympyMaxMinSplitter((summation_index, ), context).iter_split(self.expression, constraints = context.assumptions.add_condition(additional_condition))
+        else:
+            # shared by all increments with this expression
+            key = ("split", self.expression, summation_index, context.reorder_max_min_splitting)
+            split_result = context.cache.get(key)
+            if split_result is None:
+                context.info(f"splitting Increment by {summation_index}: {self.expression}")
+                split_result = SympyMaxMinSplitter((summation_index, ), context).split(self.expression)
+                context.cache.set(key, split_result)
+
+        for ineqs, expression in split_result:
+            context.count("split cases")
+            condition : typing.Any = sympy.And(*ineqs, additional_condition)
+            condition = condition.simplify() if context.sympy_simplify else LinearSystem.simplify(condition)
+            assert isinstance(condition, ResolvedIf.Union), f"condition is of unexpected type {type(condition)}"
+
+            yield from ResolvedIf.from_condition(condition, [Increment(self.symbol, expression, context)], True, context)
+
+    def summation(self, summation_index : sympy.Symbol, start : typing.Any, end : typing.Any, additional_conditions : list[In_Equality], context : TransformContext | None = None) -> ResolvedBlock:
+        if context is None:
+            context = TransformContext()
+
+        back = sympy.Add(end, -1)
+        summation = Increment.cached_summation(self.expression, (summation_index, start, back), context)
+
+        condition : typing.Any = sympy.And(sympy.StrictLessThan(start, end), *additional_conditions)
+        assert isinstance(condition, ResolvedIf.Union), f"condition is of unexpected type {type(condition)}"
+
+        return ResolvedIf.from_condition(condition, [Increment(self.symbol, summation, context)], False, context)
+
+    @staticmethod
+    def cached_summation(expression : typing.Any, summation_symbols : tuple[sympy.Symbol, typing.Any, typing.Any], context : TransformContext) -> typing.Any:
+        """sympy.summation(expression, (index, first, last)), cached in the context"""
+        key = ("summation", expression, summation_symbols)
+        summation = context.cache.get(key)
+        if summation is None:
+            with context.timed("summation time"):
+                summation = sympy.summation(expression, summation_symbols)
+            context.cache.set(key, summation)
+        else:
+            context.count("summation cache hits")
+        context.count("summations")
+        return summation
+
+    pass
+
+class If: 
+    """represents an if statement"""
+    __slots__ = ("condition", "block")
+
+    def __init__(self, condition : typing.Any, block : StatementBlock, context : TransformContext | None = None):
+        if context is not None and context.simplify_condition:
+            condition = condition.simplify() if context.sympy_simplify else LinearSystem.simplify(condition)
+        assert isinstance(condition, Inequality | boolalg.BooleanFunction | boolalg.BooleanTrue | boolalg.BooleanFalse), f"condition must be a boolean function or inequality but is {type(condition)}"
+
+        self.condition = condition
+        self.block = block
+        return
+
+    def negate(self, block : StatementBlock, context : TransformContext | None = None) -> If:
+        return If(sympy.Not(self.condition), block, context)
+
+    def subtree_key(self) -> tuple[typing.Any, ...]:
+        return ("if", self.condition, self.block.subtree_key())
+
+    def resolve(self, context : TransformContext | None = None) -> ResolvedBlock:
+        """
+        split into disjunctive normal form (mutually exclusive conjunctions) and conjugate nested if statements into a single one
+        """
+        if context is None:
+            context = TransformContext()
+
+        return context.resolve_cached(self, lambda: self._resolve_condition(context))
+
+    def _resolve_condition(self, context : TransformContext) -> ResolvedBlock:
+        resolved_block = self.block.resolve(context)
+
+        resolved_conditions : list[ResolvedIf.Union] = []
+
+        if not isinstance(self.condition, boolalg.BooleanFunction):
+            resolved_conditions.append(self.condition)
+        elif context.decision_diagrams:
+            with context.timed("decision diagrams"):
+                resolved_conditions += DecisionDiagram.disjoint_conditions(self.condition, context)
+        else:
+            dnf_condition = sympy.to_dnf(self.condition, context.simplify_dnf, True)
+
+            if isinstance(dnf_condition, sympy.And):
+                resolved_conditions.append(dnf_condition)
+            else:
+                assert isinstance(dnf_condition, sympy.Or), f"condition is of unexpected type {type(dnf_condition)}"
+
+                negated_conditions = True
+                for eq in dnf_condition.args:
+                    condition = sympy.And(negated_conditions, eq)
+                    assert isinstance(condition, ResolvedIf.Union), f"condition is of unexpected type {type(condition)}"
+                    resolved_conditions.append(condition)
+                    negated_conditions = sympy.And(negated_conditions, sympy.Not(eq))
+                
+        return_block = ResolvedBlock()
+
+        for resolved_condition in resolved_conditions:
+            increment_list : list[Increment] = []
+            for resolved_statement in resolved_block:
+                if isinstance(resolved_statement, Increment):
+                    increment_list.append(resolved_statement)
+                else:
+                    return_block.extend(resolved_statement.conjugate(resolved_condition, context))
+
+            return_block.extend(ResolvedIf.from_condition(resolved_condition, increment_list, False, context))
+
+        return return_block
+
+    pass
+
+class For:
+    __slots__ = ("summation_index", "block", "inequalities")
+
+    def __init__(self, summation_index : sympy.Symbol, inequalities : list[Inequality], block : StatementBlock):
+        self.summation_index = summation_index
+        self.block = block
+        self.inequalities = inequalities
+        for inequality in self.inequalities:
+            assert inequality.has(self.summation_index), f"inequality must contain the index {self.summation_index} but is {inequality}"
+
+        return
+
+    def subtree_key(self) -> tuple[typing.Any, ...]:
+        return ("for", self.summation_index, tuple(self.inequalities), self.block.subtree_key())
+    
+    @staticmethod
+    def _split_inequalities(summation_index : sympy.Symbol, inequalities : list[In_Equality]) -> tuple[typing.Any, typing.Any, list[In_Equality]]:
+        starts : list[typing.Any] = []
+        ends : list[typing.Any] = []
+        remaining : list[In_Equality] = []
+
+        inequalities = [in_equality for in_equality in inequalities if in_equality.has(summation_index) or remaining.append(in_equality)]
+
+        reduce_inequalities_result : typing.Any = sympy.reduce_inequalities(inequalities, summation_index)
+        if isinstance(reduce_inequalities_result, sympy.And):
+            assert is_in_equality_tuple(reduce_inequalities_result.args), f"inequalities must be in conjunctive normal form but are {reduce_inequalities_result}"
+            reduced_inequalities = list(reduce_inequalities_result.args)
+        elif isinstance(reduce_inequalities_result, In_Equality):
+            reduced_inequalities = [reduce_inequalities_result]
+        else:
+            raise Exception(f"inequalities are of unexpected type {type(reduce_inequalities_result)}")
+        
+        for in_equality in reduced_inequalities:
+            if isinstance(in_equality.lhs, sympy.core.numbers.NegativeInfinity):
+                continue
+
+            is_lhs = in_equality.lhs == summation_index
+
+            if in_equality.rel_op == "==":
+                if is_lhs: # x = rhs
+                    starts.append(in_equality.rhs)
+                    ends.append(sympy.Add(in_equality.rhs, 1))
+                else:   # lhs = x
+                    starts.append(in_equality.lhs)
+                    ends.append(sympy.Add(in_equality.lhs, 1))
+
+            elif in_equality.rel_op == "<":
+                if is_lhs:  # x < rhs 
+                    ends.append(in_equality.rhs)
+                else:   # lhs < x
+                    starts.append(sympy.Add(in_equality.lhs, 1))
+
+            elif in_equality.rel_op == "<=": 
+                if is_lhs:  # x <= rhs 
+                    ends.append(sympy.Add(in_equality.rhs, 1))
+                else:   # lhs <= x
+                    starts.append(in_equality.lhs)
+                    
+            elif in_equality.rel_op == ">":  
+                if is_lhs:  # rhs < x
+                    starts.append(sympy.Add(in_equality.rhs, 1))
+                else:   # x < lhs
+                    ends.append(in_equality.lhs)
+                    
+            elif in_equality.rel_op == ">=":
+                if is_lhs:   # rhs <= x
+                    starts.append(in_equality.rhs)
+                else:   # x <= lhs
+                    ends.append(sympy.Add(in_equality.lhs, 1))
+
+            else:
+                raise Exception(in_equality.rel_op)
+
+        return sympy.Max(*starts), sympy.Min(*ends), remaining
+
+    def resolve(self, context : TransformContext | None = None) -> ResolvedBlock:
+        """
+        merge resolved if statements into the enclosing for statement (or extract them)
+        resolve for statement (or count the lattice points of the whole loop nest with the polyhedral backend)
+        keep the for statement as a loop if the budget is exceeded or if the block still contains a loop
+        with checkpoint_dir the result is loaded from its checkpoint or saved to it
+        """
+        if context is None:
+            context = TransformContext()
+
+        return context.resolve_cached(self, lambda: self._resolve_checkpointed(context))
+
+    def _resolve_checkpointed(self, context : TransformContext) -> ResolvedBlock:
+        if context.checkpoints is None:
+            return self._resolve_loop(context)
+
+        resolved_block = context.checkpoints.get(self, context)
+        if resolved_block is not None:
+            context.count("checkpoints loaded")
+            context.info(f"loop over {self.summation_index} loaded from checkpoint")
+            return resolved_block
+        report_length = len(context.budget.report)
+        resolved_block = self._resolve_loop(context)
+        # a loop kept because the budget ran out is resolved again after a restart
+        if len(context.budget.report) == report_length and context.checkpoints.set(self, context, resolved_block):
+            context.count("checkpoints saved")
+        return resolved_block
+
+    def _resolve_loop(self, context : TransformContext) -> ResolvedBlock:
+        if context.count_compositions and not context.tighten_loop_bounds:
+            compositions = self._count_compositions(context)
+            if compositions is not None:
+                return compositions
+
+        if context.backend == "polyhedral" and not context.tighten_loop_bounds:
+            try:
+                with context.timed(f"polyhedral {self.summation_index}"):
+                    return PolyhedralCounter.count(self, context)
+            except PolyhedronUnsupported as exception:
+                context.info(f"loop over {self.summation_index} resolved by splitting: {exception}")
+            except BudgetExceeded as exception:
+                # the inner loops might still be countable
+                context.budget.report.append(f"polyhedron of the loop over {self.summation_index} not counted: {exception}")
+                context.info(context.budget.report[-1])
+
+        inner_block = self.block.resolve(context)
+
+        ineqs = typing.cast(list[In_Equality], self.inequalities)
+        start, end, remaining = self._split_inequalities(self.summation_index, ineqs)
+        assert len(remaining) == 0, f"for statement can't have from {self.summation_index} independant inequalities but has {remaining}"
+
+        if context.tighten_loop_bounds:
+            try:
+                with context.timed(f"tighten {self.summation_index}"):
+                    return self._tighten(inner_block, context)
+            except BudgetExceeded as exception:
+                reason = f"bounds of the loop over {self.summation_index} not tightened: {exception}"
+                context.budget.report.append(reason)
+                context.info(reason)
+                return ResolvedBlock([ResolvedFor(self.summation_index, start, end, inner_block, reason = reason)])
+
+        # sympy can't sum binomials of compositions counted by an inner loop
+        def has_binomial(statement : ResolvedIf | Increment | ResolvedFor) -> bool:
+            if isinstance(statement, ResolvedIf):
+                return any(increment.expression.has(Binomial) for increment in statement.block)
+            return isinstance(statement, Increment) and statement.expression.has(Binomial)
+
+        if any(isinstance(resolved_statement, ResolvedFor) or has_binomial(resolved_statement) for resolved_statement in inner_block):
+            return ResolvedBlock([ResolvedFor(self.summation_index, start, end, inner_block)])
+
+        try:
+            with context.timed(f"resolve {self.summation_index}"):
+                return self._resolve(inner_block, start, end, context)
+        except BudgetExceeded as exception:
+            reason = f"loop over {self.summation_index} kept: {exception}"
+            context.budget.report.append(reason)
+            context.info(reason)
+            return ResolvedBlock([ResolvedFor(self.summation_index, start, end, inner_block, reason = reason)])
+
+    def _count_compositions(self, context : TransformContext) -> ResolvedBlock | None:
+        """
+        recognize nested loops counting bounded compositions: the indices x_0, ..., x_n-2 and the remainder y of a sum are bounded from both sides
+        e.g. the real world example, every index and m = SUM - i - j - k - l lies in [min, UPPER]
+        the number of compositions is an alternating sum of binomial coefficients (stars and bars with inclusion-exclusion)
+        loop bounds like i <= SUM - j (prefix sums) are only allowed if they are implied by the other bounds, the result is guarded by that
+        returns None if the loops aren't of this shape
+        """
+        loops : list[For] = [self]
+        while len(loops[-1].block) == 1 and isinstance(loops[-1].block[0], For):
+            loops.append(loops[-1].block[0])
+        indices = [loop.summation_index for loop in loops]
+
+        innermost = loops[-1].block
+        relationals : list[typing.Any] = []
+        if len(innermost) == 1 and isinstance(innermost[0], If) and len(innermost[0].block) == 1:
+            conditions = innermost[0].condition.args if isinstance(innermost[0].condition, sympy.And) else (innermost[0].condition, )
+            if not all(isinstance(condition, In_Equality) for condition in conditions):
+                return None
+            relationals += [relational for condition in conditions for relational in
+                            ((sympy.LessThan(condition.lhs, condition.rhs), sympy.GreaterThan(condition.lhs, condition.rhs)) if isinstance(condition, sympy.Equality) else (condition, ))]
+            innermost = innermost[0].block
+        if len(innermost) != 1 or not isinstance(innermost[0], Increment) or innermost[0].expression != 1:
+            return None
+        counter = innermost[0].symbol
+
+        for loop in loops:
+            for inequality in loop.inequalities:
+                if isinstance(inequality, sympy.LessThan) and inequality.rhs == loop.summation_index:
+                    relationals += [sympy.LessThan(start, loop.summation_index, evaluate = False) for start in For._arguments(inequality.lhs, sympy.Max)]
+                elif isinstance(inequality, sympy.StrictLessThan) and inequality.lhs == loop.summation_index:
+                    relationals += [sympy.StrictLessThan(loop.summation_index, end, evaluate = False) for end in For._arguments(inequality.rhs, sympy.Min)]
+                else:
+                    return None
+
+        # every relational as q <= 0, classified by the indices in q
+        lows : list[list[typing.Any]] = [[] for _ in indices]
+        highs : list[list[typing.Any]] = [[] for _ in indices]
+        prefix_highs : list[list[typing.Any]] = [[] for _ in indices]
+        sum_lows : list[typing.Any] = []
+        sum_highs : list[typing.Any] = []
+        for relational in relationals:
+            if isinstance(relational, sympy.LessThan | sympy.StrictLessThan):
+                q = relational.lhs - relational.rhs
+            else:
+                q = relational.rhs - relational.lhs
+            if isinstance(relational, sympy.StrictLessThan | sympy.StrictGreaterThan):
+                q += 1
+            q = q.expand()
+            coefficients = [q.coeff(index) for index in indices]
+            rest = q - sum(coefficient * index for coefficient, index in zip(coefficients, indices))
+            involved = [i for i, coefficient in enumerate(coefficients) if coefficient != 0]
+            if rest.has(*indices) or len(involved) == 0 or len({coefficients[i] for i in involved}) != 1 or coefficients[involved[0]] not in (1, -1):
+                return None
+            sign = coefficients[involved[0]]
+
+            if len(involved) == 1:
+                (lows if sign == -1 else highs)[involved[0]].append(-sign * rest)
+            elif involved != list(range(len(involved))):
+                return None
+            elif len(involved) == len(indices):
+                (sum_lows if sign == -1 else sum_highs).append(-sign * rest)
+            elif sign == 1:
+                prefix_highs[len(involved) - 1].append(-rest)
+            else:
+                return None
+
+        if len(sum_highs) == 0 or any(len(low) == 0 for low in lows):
+            return None
+
+        starts = [sympy.Max(*low) for low in lows]
+        total = sympy.Min(*sum_highs)
+        # the remainder y = total - sum of the indices is in [0, total - max(sum_lows)]
+        ranges = [sympy.Min(*high) - start if high else None for start, high in zip(starts, highs)]
+        ranges.append(total - sympy.Max(*sum_lows) if sum_lows else None)
+
+        # x_0 + ... + x_t <= total - (x_t+1 + ... + x_n-2) - y <= total - (start_t+1 + ... + start_n-2)
+        guard = sympy.And(*(total - sum(starts[t + 1:]) <= prefix_high for t, prefix_high_list in enumerate(prefix_highs) for prefix_high in prefix_high_list))
+
+        stars = total - sum(starts)
+        bars = len(indices)
+        bounded = [r for r in ranges if r is not None]
+        count = sympy.Add(*((-1)**len(subset) * Binomial(stars - sum(r + 1 for r in subset) + bars, bars)
+                            for size in range(len(bounded) + 1) for subset in itertools.combinations(bounded, size)))
+        context.count("composition counts")
+        context.info(f"counting compositions over {', '.join(map(str, indices))}")
+
+        # there are no compositions if a range is empty, the formula only holds for non-empty ranges
+        condition = sympy.And(guard, *(r >= 0 for r in bounded))
+        return_block = ResolvedIf.from_condition(condition, [Increment(counter, count, context)], context = context)
+        if not isinstance(guard, boolalg.BooleanTrue):
+            # keep the loops where the prefix sum bounds aren't implied
+            kept : ResolvedBlock = loops[-1].block.resolve(context)
+            for loop in reversed(loops):
+                start, end, _ = For._split_inequalities(loop.summation_index, typing.cast(list[In_Equality], loop.inequalities))
+                kept = ResolvedBlock([ResolvedFor(loop.summation_index, start, end, kept)])
+            outermost = kept[0]
+            assert isinstance(outermost, ResolvedFor)
+            outermost.condition = sympy.Not(guard)
+            outermost.reason = f"compositions over {', '.join(map(str, indices))} can only be counted if {guard}"
+            return_block.append(outermost)
+        return return_block
+
+    @staticmethod
+    def _arguments(expression : typing.Any, func : type[sympy.Max] | type[sympy.Min]) -> list[typing.Any]:
+        """the arguments of a max/min, also if a term is added to it (max(a, b) + c is max(a + c, b + c))"""
+        if isinstance(expression, func):
+            return [argument for arg in expression.args for argument in For._arguments(arg, func)]
+        if isinstance(expression, sympy.Add):
+            terms = [arg for arg in expression.args if isinstance(arg, func)]
+            if len(terms) == 1 and not (expression - terms[0]).has(sympy.Max, sympy.Min):
+                return [argument + expression - terms[0] for argument in For._arguments(terms[0], func)]
+        return [expression]
+
+    def _tighten(self, inner_block : ResolvedBlock, context : TransformContext) -> ResolvedBlock:
+        """
+        keep the loop, one loop per statement of the resolved body
+        the inequalities of the statement's condition containing the index become bounds of the loop, the others guard it
+        """
+        bodies : list[tuple[ResolvedIf.Union, ResolvedBlock]] = []
+        increments = ResolvedBlock(statement for statement in inner_block if isinstance(statement, Increment))
+        if increments:
+            bodies.append((sympy.true, increments))
+        for statement in inner_block:
+            if isinstance(statement, ResolvedIf):
+                bodies.append((statement.condition, ResolvedBlock(statement.block)))
+            elif isinstance(statement, ResolvedFor):
+                # iterate only where the inner loop isn't empty, max(starts) < min(ends) holds if every start is less than every end
+                not_empty = sympy.And(*(sympy.StrictLessThan(start, end) for start in For._arguments(statement.start, sympy.Max) for end in For._arguments(statement.end, sympy.Min)))
+                bodies.append((sympy.And(statement.condition, not_empty), ResolvedBlock([ResolvedFor(statement.summation_index, statement.start, statement.end, statement.block, reason = statement.reason)])))
+
+        return_block = ResolvedBlock()
+        for condition, body in bodies:
+            # max/min of the index can't become a bound, split them first
+            constraints = context.assumptions.add_condition(condition) if context.prune_infeasible_splits else None
+            for new_inequalities, modified_condition in SympyMaxMinSplitter((self.summation_index, ), context).iter_split(condition, constraints = constraints):
+                split_condition = sympy.And(*new_inequalities, modified_condition)
+                if isinstance(split_condition, boolalg.BooleanFalse):
+                    continue
+                conjuncts = split_condition.args if isinstance(split_condition, sympy.And) else (split_condition, )
+                bounds : list[In_Equality] = []
+                guards : list[typing.Any] = []
+                for conjunct in conjuncts:
+                    if not conjunct.has(self.summation_index):
+                        guards.append(conjunct)
+                        continue
+                    assert isinstance(conjunct, In_Equality), f"condition of the loop over {self.summation_index} must be a conjunction of inequalities but is {split_condition}"
+                    difference = (conjunct.lhs - conjunct.rhs).expand()
+                    if difference.has(self.summation_index):
+                        bounds.append(conjunct)
+                    else:
+                        # the index cancels out, e.g. in a - i < b - i
+                        guards.append(type(conjunct)(difference, 0))
+
+                start, end, remaining = self._split_inequalities(self.summation_index, self.inequalities + bounds)
+                guard = sympy.And(*remaining, *guards)
+                if not isinstance(guard, boolalg.BooleanFalse):
+                    return_block.append(ResolvedFor(self.summation_index, start, end, body, guard))
+
+        context.count("tightened loops", len(return_block))
+        return return_block
+
+    def prefix_count(self, bound : sympy.Symbol, context : TransformContext | None = None) -> CSEBlock:
+        """the transformed loop stopped before its index reaches bound, i.e. the closed form of its first iterations"""
+        if context is None:
+            context = TransformContext()
+
+        with context.timed(f"prefix count {self.summation_index}"):
+            prefix = For(self.summation_index, self.inequalities + [sympy.StrictLessThan(self.summation_index, bound)], self.block)
+            return StatementBlock([prefix]).resolve(context).cse(context)
+
+    def _resolve(self, inner_block : ResolvedBlock, start : typing.Any, end : typing.Any, context : TransformContext) -> ResolvedBlock:
+        """
+        the cases of the split max/min flow one after another through the removal of redundant inequalities and the summation,
+        so the branch budget is checked before the remaining cases are split, the summed branches are collected into one block
+        """
+        budget = context.budget
+        budget.check_time()
+        resolved_statements : typing.Iterator[ResolvedIf | Increment] = inner_block.iter_eliminate_symbol_from_max_min(self.summation_index, context)
+        if context.remove_redundant_inequalities:
+            resolved_statements = (minimized for resolved_statement in resolved_statements
+                                   for minimized in (resolved_statement.remove_redundant_inequalities(context) if isinstance(resolved_statement, ResolvedIf) else [resolved_statement]))
+        return_block = ResolvedBlock()
+
+        for cases, resolved_statement in enumerate(resolved_statements, 1):
+            budget.check_branches(cases)
+            budget.check_time()
+            if isinstance(resolved_statement, ResolvedIf):
+                if isinstance(resolved_statement.condition, sympy.And):
+                    assert is_in_equality_tuple(resolved_statement.condition.args), f"condition must be in conjunctive normal form but is {resolved_statement.condition}"
+                    new_inequalities = self.inequalities + [*resolved_statement.condition.args]
+                elif isinstance(resolved_statement.condition, In_Equality):
+                    new_inequalities = self.inequalities + [resolved_statement.condition]
+                else:
+                    raise Exception(f"condition is of unexpected type {type(resolved_statement.condition)}")
+                
+                temp_start, temp_end, additional_conditions = self._split_inequalities(self.summation_index, new_inequalities)
+
+                for increment in resolved_statement.block:
+                    return_block.extend(increment.summation(self.summation_index, temp_start, temp_end, additional_conditions, context))
+
+            else:
+                return_block.extend(resolved_statement.summation(self.summation_index, start, end, [], context))
+
+        budget.check_branches(len(return_block))
+        context.count("branches", len(return_block))
+        return return_block
+
+    pass
+
+
+class PolyhedronUnsupported(Exception):
+    """the loops can't be counted by PolyhedralCounter, e.g. because an index has a coefficient other than +-1 (which would require quasi-polynomials)"""
+    pass
+
+class PolyhedralCounter:
+    """
+    alternative backend (TransformContext(backend = "polyhedral")), sums every increment over the lattice points of a polyhedron
+    the polyhedron is built directly from the bounds of the enclosing loops and the conditions of the enclosing if statements
+    the indices are eliminated innermost first, every pair of a lower and an upper bound of the index is a chamber in which the sum is a polynomial
+    ties between bounds are broken by their order so the chambers are disjoint, infeasible and redundant constraints are dropped by LinearSystem
+    a constraint is an expression q with integer coefficients meaning q <= 0, a conjunction is a list of constraints
+    """
+    Conjunction : typing.TypeAlias = list[typing.Any]
+
+    @staticmethod
+    def count(loop : For, context : TransformContext) -> ResolvedBlock:
+        """the closed form of the loop, raises PolyhedronUnsupported"""
+        sums : dict[tuple[sympy.Symbol, frozenset[typing.Any]], tuple[PolyhedralCounter.Conjunction, typing.Any]] = {}
+        for indices, conjunction, increment in PolyhedralCounter._cells(StatementBlock([loop]), [], [[]], context):
+            # max/min of the indices in the increment become constraints as well
+            constraints = PolyhedralCounter._system(conjunction, context)
+            for inequalities, expression in SympyMaxMinSplitter(tuple(indices), context).iter_split(increment.expression, constraints = constraints):
+                if not expression.is_polynomial(*indices):
+                    raise PolyhedronUnsupported(f"{expression} isn't a polynomial in {', '.join(map(str, indices))}")
+                for split in PolyhedralCounter._conjoin([conjunction], PolyhedralCounter._dnf(sympy.And(*inequalities), indices), context):
+                    for chamber, summation in PolyhedralCounter._eliminate(split, indices, expression, context):
+                        context.count("polyhedral chambers")
+                        key = (increment.symbol, frozenset(chamber))
+                        sums[key] = (chamber, sums[key][1] + summation if key in sums else summation)
+
+        return_block = ResolvedBlock()
+        for (symbol, _), (chamber, summation) in sums.items():
+            condition : typing.Any = sympy.And(*(LinearSystem.relational(q) for q in chamber))
+            return_block.extend(ResolvedIf.from_condition(condition, [Increment(symbol, summation, context)], context = context))
+        context.budget.check_branches(len(return_block))
+        context.count("branches", len(return_block))
+        return return_block
+
+    @staticmethod
+    def _cells(block : StatementBlock, indices : list[sympy.Symbol], pieces : list[Conjunction], context : TransformContext) -> list[tuple[list[sympy.Symbol], Conjunction, Increment]]:
+        """every increment with the indices of the enclosing loops and the disjoint polyhedra it is executed in"""
+        cells : list[tuple[list[sympy.Symbol], PolyhedralCounter.Conjunction, Increment]] = []
+        for statement in block:
+            if isinstance(statement, Increment):
+                cells += [(indices, piece, statement) for piece in pieces]
+            elif isinstance(statement, If):
+                condition = PolyhedralCounter._dnf(sympy.to_nnf(statement.condition, False), indices)
+                cells += PolyhedralCounter._cells(statement.block, indices, PolyhedralCounter._conjoin(pieces, condition, context), context)
+            elif isinstance(statement, For):
+                inner_indices = indices + [statement.summation_index]
+                bounds = PolyhedralCounter._dnf(sympy.And(*statement.inequalities), inner_indices)
+                cells += PolyhedralCounter._cells(statement.block, inner_indices, PolyhedralCounter._conjoin(pieces, bounds, context), context)
+            else:
+                raise PolyhedronUnsupported(f"statement of unexpected type {type(statement)}")
+        return cells
+
+    @staticmethod
+    def _dnf(condition : typing.Any, indices : list[sympy.Symbol]) -> list[Conjunction]:
+        """the condition (in negation normal form) as disjunction of conjunctions, max/min of the indices are expanded"""
+        if isinstance(condition, boolalg.BooleanTrue):
+            return [[]]
+        if isinstance(condition, boolalg.BooleanFalse):
+            return []
+        if isinstance(condition, sympy.And):
+            dnf : list[PolyhedralCounter.Conjunction] = [[]]
+            for arg in condition.args:
+                dnf = [left + right for left in dnf for right in PolyhedralCounter._dnf(arg, indices)]
+            return dnf
+        if isinstance(condition, sympy.Or):
+            return [conjunction for arg in condition.args for conjunction in PolyhedralCounter._dnf(arg, indices)]
+        if isinstance(condition, sympy.Unequality):
+            difference = condition.lhs - condition.rhs
+            return PolyhedralCounter._expand(difference + 1, indices) + PolyhedralCounter._expand(1 - difference, indices)
+        if isinstance(condition, sympy.Equality):
+            difference = condition.lhs - condition.rhs
+            return [left + right for left in PolyhedralCounter._expand(difference, indices) for right in PolyhedralCounter._expand(-difference, indices)]
+        if isinstance(condition, sympy.LessThan | sympy.StrictLessThan):
+            return PolyhedralCounter._expand(condition.lhs - condition.rhs + int(isinstance(condition, sympy.StrictLessThan)), indices)
+        if isinstance(condition, sympy.GreaterThan | sympy.StrictGreaterThan):
+            return PolyhedralCounter._expand(condition.rhs - condition.lhs + int(isinstance(condition, sympy.StrictGreaterThan)), indices)
+        raise PolyhedronUnsupported(f"condition {condition} isn't a combination of (in)equalities")
+
+    @staticmethod
+    def _expand(q : typing.Any, indices : list[sympy.Symbol]) -> list[Conjunction]:
+        """q <= 0 as disjunction of conjunctions without max/min of the indices"""
+        for subexpression in sympy.preorder_traversal(q):
+            if isinstance(subexpression, sympy.Max | sympy.Min) and subexpression.has(*indices):
+                break
+        else:
+            return [[PolyhedralCounter._constraint(q)]]
+
+        coefficient = q.coeff(subexpression) if q != subexpression else 1
+        rest = q - coefficient * subexpression
+        if coefficient not in (1, -1) or rest.has(subexpression):
+            raise PolyhedronUnsupported(f"{subexpression} isn't a linear term of {q}")
+
+        # max(a, b) + rest <= 0 holds if it holds for both arguments, min(a, b) + rest <= 0 if it holds for one of them (the other way round for -max and -min)
+        parts = [PolyhedralCounter._expand(coefficient * argument + rest, indices) for argument in subexpression.args]
+        if isinstance(subexpression, sympy.Max) == (coefficient == 1):
+            dnf : list[PolyhedralCounter.Conjunction] = [[]]
+            for part in parts:
+                dnf = [left + right for left in dnf for right in part]
+            return dnf
+        return [conjunction for part in parts for conjunction in part]
+
+    @staticmethod
+    def _constraint(q : typing.Any) -> typing.Any:
+        """q with integer coefficients"""
+        q = sympy.expand(q)
+        return sympy.expand(q * math.lcm(*(coefficient.q for coefficient in q.as_coefficients_dict().values() if coefficient.is_Rational)))
+
+    @staticmethod
+    def _system(conjunction : Conjunction, context : TransformContext) -> LinearSystem:
+        """the linear constraints of the conjunction and the assumptions of the context"""
+        rows = (LinearSystem._row(q, False) for q in conjunction)
+        return context.assumptions.add(row for row in rows if row is not None)
+
+    @staticmethod
+    def _simplify(conjunction : Conjunction, context : TransformContext) -> Conjunction | None:
+        """without duplicates and constraints which always hold, None if the conjunction is infeasible"""
+        simplified : PolyhedralCounter.Conjunction = []
+        for q in conjunction:
+            if q.is_number:
+                if q > 0:
+                    return None
+            elif q not in simplified:
+                simplified.append(q)
+        return simplified if PolyhedralCounter._system(simplified, context).is_feasible() else None
+
+    @staticmethod
+    def _conjoin(pieces : list[Conjunction], dnf : list[Conjunction], context : TransformContext) -> list[Conjunction]:
+        """the feasible pairwise conjunctions of pieces and the disjunctions of dnf made disjoint"""
+        disjoint : list[PolyhedralCounter.Conjunction] = []
+        for k, conjunction in enumerate(dnf):
+            # conjunction and not earlier: the first i constraints of earlier hold, the next one doesn't (not q <= 0 is 1 - q <= 0 over the integers)
+            parts = [conjunction]
+            for earlier in dnf[:k]:
+                parts = [part + earlier[:i] + [1 - earlier[i]] for part in parts for i in range(len(earlier))]
+            disjoint += parts
+
+        conjoined : list[PolyhedralCounter.Conjunction] = []
+        for piece in pieces:
+            for part in disjoint:
+                simplified = PolyhedralCounter._simplify(piece + part, context)
+                if simplified is not None:
+                    conjoined.append(simplified)
+        return conjoined
+
+    @staticmethod
+    def _irredundant(conjunction : Conjunction, context : TransformContext) -> Conjunction:
+        """without the constraints implied by the others (and the assumptions)"""
+        kept = list(conjunction)
+        for q in conjunction:
+            others = [other for other in kept if other is not q]
+            if not PolyhedralCounter._system(others + [1 - q], context).is_feasible():
+                kept = others
+        return kept
+
+    @staticmethod
+    def _eliminate(conjunction : Conjunction, indices : list[sympy.Symbol], expression : typing.Any, context : TransformContext) -> typing.Iterator[tuple[Conjunction, typing.Any]]:
+        """the chambers in the parameters and the sum of expression over the lattice points of the polyhedron in each of them"""
+        context.budget.check_time()
+        conjunction = PolyhedralCounter._irredundant(conjunction, context)
+        if not indices:
+            yield conjunction, expression
+            return
+
+        index = indices[-1]
+        lowers : list[typing.Any] = []
+        uppers : list[typing.Any] = []
+        others : PolyhedralCounter.Conjunction = []
+        for q in conjunction:
+            coefficient = q.coeff(index)
+            if (q - coefficient * index).has(index) or coefficient not in (0, 1, -1):
+                raise PolyhedronUnsupported(f"{index} isn't a linear term with coefficient +-1 of {q} <= 0")
+            if coefficient == 1:    # index <= -(q - index)
+                uppers.append(index - q)
+            elif coefficient == -1: # q + index <= index
+                lowers.append(q + index)
+            else:
+                others.append(q)
+        if not lowers or not uppers:
+            raise PolyhedronUnsupported(f"{index} is unbounded in {conjunction}")
+
+        # an equality (e.g. from i == j) determines the index, substituting it avoids a chamber per tie
+        for lower in lowers:
+            if lower in uppers:
+                simplified = PolyhedralCounter._simplify([sympy.expand(q.subs(index, lower)) for q in conjunction], context)
+                if simplified is not None:
+                    yield from PolyhedralCounter._eliminate(simplified, indices[:-1], expression.subs(index, lower), context)
+                return
+
+        for a, lower in enumerate(lowers):
+            for c, upper in enumerate(uppers):
+                # lower is the greatest lower bound (the first one if several are equal), upper the least upper bound, and lower <= upper
+                chamber = others + [other - lower + int(b < a) for b, other in enumerate(lowers) if b != a] \
+                                 + [upper - other + int(d < c) for d, other in enumerate(uppers) if d != c] + [lower - upper]
+                simplified = PolyhedralCounter._simplify([sympy.expand(q) for q in chamber], context)
+                if simplified is None:
+                    continue
+                summation = Increment.cached_summation(expression, (index, lower, upper), context)
+                yield from PolyhedralCounter._eliminate(simplified, indices[:-1], summation, context)
+
+    pass
+
+
+class ResolvedIf:
+    """
+    represents an if statement whose condition contains only conjunctions of inequalities
+    in a CSEBlock the condition may also be a disjunction of mutually exclusive conjunctions (see ResolvedBlock.merge_identical_branches)
+    """
+    __slots__ = ("condition", "block")
+    Union : typing.TypeAlias = sympy.And | In_Equality | sympy.Symbol | boolalg.BooleanTrue | boolalg.BooleanFalse
+
+    @staticmethod
+    def from_condition(condition : Union, block : list[Increment], is_simplified : bool = False, context : TransformContext | None = None) -> ResolvedBlock:
+        if not block:
+            return ResolvedBlock()
+
+        if context is not None and context.simplify_condition and is_simplified == False:
+            condition = condition.simplify() if context.sympy_simplify else LinearSystem.simplify(condition)
+            assert isinstance(condition, ResolvedIf.Union), f"condition is of unexpected type {type(condition)}"
+
+        if isinstance(condition, sympy.And):
+            return ResolvedBlock([ResolvedIf(condition, block)])
+
+        elif isinstance(condition, In_Equality | sympy.Symbol):
+            return ResolvedBlock([ResolvedIf(condition, block)])
+
+        elif isinstance(condition, boolalg.BooleanTrue):
+            return ResolvedBlock(block)
+
+        elif isinstance(condition, boolalg.BooleanFalse):
+            return ResolvedBlock()
+
+        raise Exception(f"condition is of unexpected type {type(condition)}")
+
+    def __init__(self, condition : sympy.And | sympy.Or | In_Equality | sympy.Symbol, block : list[Increment]):
+        if isinstance(condition, sympy.And):
+            assert is_in_equality_or_symbol_tuple(condition.args), f"condition must be in conjunctive normal form but is {condition}"
+        self.condition = condition
+        self.block = block
+
+        return
+
+    def conjugate(self, other_condition : Union, context : TransformContext | None = None) -> ResolvedBlock:
+        """
+        conjugates self and a condition
+        """
+        conjugated_condition = sympy.And(self.condition, other_condition)
+        assert isinstance(conjugated_condition, ResolvedIf.Union), f"conjugated condition is of unexpected type {type(conjugated_condition)}"
+        if isinstance(conjugated_condition, sympy.And):
+            assert is_in_equality_or_symbol_tuple(conjugated_condition.args), f"condition must be in conjunctive normal form but is {conjugated_condition}"
+        return ResolvedIf.from_condition(conjugated_condition, self.block, False, context)
+
+    def remove_redundant_inequalities(self, context : TransformContext | None = None) -> ResolvedBlock:
+        """without the inequalities implied by the others (exact for linear inequalities), empty if they contradict each other"""
+        if context is None:
+            context = TransformContext()
+
+        conjuncts = list(self.condition.args) if isinstance(self.condition, sympy.And) else [self.condition]
+        with context.timed("redundant inequalities time"):
+            kept = context.assumptions.irredundant(conjuncts)
+        if kept is None:
+            context.count("contradicting conditions")
+            return ResolvedBlock()
+        if len(kept) == len(conjuncts):
+            return ResolvedBlock([self])
+        context.count("redundant inequalities", len(conjuncts) - len(kept))
+        return ResolvedIf.from_condition(sympy.And(*kept), self.block, True, context)
+
+    def eliminate_symbol_from_max_min(self, summation_index : sympy.Symbol, context : TransformContext | None = None) -> ResolvedBlock:
+        return ResolvedBlock(self.iter_eliminate_symbol_from_max_min(summation_index, context))
+
+    def iter_eliminate_symbol_from_max_min(self, summation_index : sympy.Symbol, context : TransformContext | None = None) -> typing.Iterator[ResolvedIf | Increment]:
+        """yields the branches one case after another"""
+        if context is None:
+            context = TransformContext()
+
+        context.info(f"splitting ResolvedIf by {summation_index}: {self.condition}")
+        constraints = context.assumptions.add_condition(self.condition) if context.prune_infeasible_splits else None
+        split_result = SympyMaxMinSplitter((summation_index, ), context).iter_split(self.condition, constraints = constraints)
+        for new_inequalities, modified_condition in split_result:
+            new_condition = sympy.And(*new_inequalities, modified_condition)
+            assert isinstance(new_condition, ResolvedIf.Union), f"new condition is of unexpected type {type(new_condition)}"
+
+            for increment in self.block:
+                yield from increment.iter_eliminate_symbol_from_max_min(summation_index, new_condition, context)
+
+    pass
+
+class ResolvedFor:
+    """represents a for statement which is kept as a loop in the output (e.g. because its resolution exceeded the budget)"""
+    __slots__ = ("summation_index", "start", "end", "block", "condition", "reason")
+
+    def __init__(self, summation_index : sympy.Symbol, start : typing.Any, end : typing.Any, block : ResolvedBlock | CSEBlock,
+                 condition : ResolvedIf.Union = sympy.true, reason : str | None = None):
+        self.summation_index = summation_index
+        self.start = start
+        self.end = end
+        self.block = block
+        self.condition = condition
+        self.reason = reason
+        """why the loop was kept, None if it was kept because it contains a loop"""
+        return
+
+    def conjugate(self, other_condition : ResolvedIf.Union, context : TransformContext | None = None) -> ResolvedBlock:
+        """
+        conjugates the condition guarding the loop and a condition
+        """
+        conjugated_condition = sympy.And(self.condition, other_condition)
+        assert isinstance(conjugated_condition, ResolvedIf.Union), f"conjugated condition is of unexpected type {type(conjugated_condition)}"
+
+        if isinstance(conjugated_condition, boolalg.BooleanFalse):
+            return ResolvedBlock()
+        return ResolvedBlock([ResolvedFor(self.summation_index, self.start, self.end, self.block, conjugated_condition, self.reason)])
+
+    pass
+
+
+class StatementBlock(list[Statement]):
+    def resolve(self, context : TransformContext | None = None) -> ResolvedBlock:
+        """
+        merge arithmetic statements with the same symbol, conjoin if statements with the same condition
+        if the result is symmetric in some parameters resolve it for sorted parameters only (exploit_symmetries)
+        """
+        if context is None:
+            context = TransformContext()
+        if context.resolve_depth == 0:
+            context.budget.start()
+
+        if context.exploit_symmetries and context.resolve_depth == 0 and not context.tighten_loop_bounds:
+            with context.timed("symmetry detection"):
+                groups = self.symmetries(context)
+            if groups:
+                return self._resolve_sorted(groups, context)
+
+        context.resolve_depth += 1
+        try:
+            return self._resolve(context)
+        finally:
+            context.resolve_depth -= 1
+
+    def _resolve_sorted(self, groups : list[list[sympy.Symbol]], context : TransformContext) -> ResolvedBlock:
+        """
+        resolve assuming the parameters of every group are sorted, then substitute the order statistics of the actual parameters
+        e.g. for the group a, b: a <= b is assumed, a becomes min(a, b) and b max(a, b)
+        """
+        context.info(f"symmetric in {'; '.join(', '.join(map(str, group)) for group in groups)}")
+        context.count("symmetric groups", len(groups))
+        substitutions : dict[sympy.Symbol, typing.Any] = {}
+        assumptions : list[In_Equality] = []
+        for group in groups:
+            assumptions += [sympy.LessThan(lesser, greater) for lesser, greater in zip(group, group[1:])]
+            # bubble sort network, values[i] is the i-th smallest parameter
+            values : list[typing.Any] = list(group)
+            for end in range(len(values) - 1, 0, -1):
+                for i in range(end):
+                    values[i], values[i + 1] = sympy.Min(values[i], values[i + 1]), sympy.Max(values[i], values[i + 1])
+            substitutions.update(zip(group, values))
+
+        previous_assumptions = context.assumptions
+        context.assumptions = previous_assumptions.add_condition(sympy.And(*assumptions))
+        context.resolve_depth += 1
+        try:
+            representative = self._resolve(context)
+        finally:
+            context.resolve_depth -= 1
+            context.assumptions = previous_assumptions
+        return representative.xreplace(substitutions)
+
+    def symmetries(self, context : TransformContext | None = None) -> list[list[sympy.Symbol]]:
+        """
+        groups of parameters which can be permuted (together with the summation indices) without changing the result
+        two parameters are interchangeable if swapping them and permuting the indices maps the polyhedra of the increments (see PolyhedralCounter) onto each other
+        """
+        if context is None:
+            context = TransformContext()
+
+        indices = sorted(self.summation_indices(), key = str)
+        if len(indices) > 6:
+            return []   # too many permutations of the indices to try
+        try:
+            cells = PolyhedralCounter._cells(self, [], [[]], context)
+        except PolyhedronUnsupported:
+            return []
+
+        def canonical(mapping : dict[sympy.Symbol, sympy.Symbol]) -> collections.Counter:
+            return collections.Counter((increment.symbol, increment.expression.xreplace(mapping), frozenset(q.xreplace(mapping) for q in conjunction))
+                                       for increment, conjunction in irredundant)
+        irredundant = [(increment, PolyhedralCounter._irredundant(conjunction, context)) for _, conjunction, increment in cells]
+        identity = canonical({})
+        results = {increment.symbol for _, _, increment in cells}
+        parameters = sorted(self.free_symbols() - set(indices) - results, key = str)
+
+        # interchangeable parameters occur with the same coefficients, only those are tried
+        # parameters which occur in no bound or condition only swap increments, sorting them prunes nothing
+        signatures = {parameter : sorted(str(q.coeff(parameter)) for _, conjunction in irredundant for q in conjunction if q.coeff(parameter) != 0)
+                      for parameter in parameters}
+        parameters = [parameter for parameter in parameters if signatures[parameter]]
+        groups = {parameter : [parameter] for parameter in parameters}
+        for a, b in itertools.combinations(parameters, 2):
+            if groups[a] is groups[b] or signatures[a] != signatures[b]:
+                continue
+            if any(canonical({a : b, b : a} | dict(zip(indices, permutation))) == identity for permutation in itertools.permutations(indices)):
+                merged = groups[a] + groups[b]
+                for parameter in merged:
+                    groups[parameter] = merged
+        return sorted((sorted(group, key = str) for group in {id(group) : group for group in groups.values()}.values() if len(group) > 1), key = lambda group: str(group[0]))
+
+    def subtree_key(self) -> tuple[typing.Any, ...]:
+        """hashable representation of the statements and their subtrees (key of TransformContext.resolve_cached)"""
+        return tuple(statement.subtree_key() for statement in self)
+
+    def _resolve(self, context : TransformContext) -> ResolvedBlock:
+        return context.resolve_cached(self, lambda: self._resolve_statements(context))
+
+    def _resolve_statements(self, context : TransformContext) -> ResolvedBlock:
+        increment_list : list[Increment] = []
+        resolved_if_list : list[ResolvedIf] = []
+        resolved_for_list : list[ResolvedFor] = []
+        for statement in self:
+            for resolved_statement in statement.resolve(context):
+                if isinstance(resolved_statement, Increment):
+                    increment_list.append(resolved_statement)
+                elif isinstance(resolved_statement, ResolvedIf):
+                    resolved_if_list.append(resolved_statement)
+                else:
+                    resolved_for_list.append(resolved_statement)
+        
+        # merge increments with the same symbol
+        def merge_increment(increment_list : list[Increment]) -> list[Increment]:
+            increment_dict : dict[sympy.Symbol, list[Increment]] = {}
+            for increment in increment_list:
+                increment_dict.setdefault(increment.symbol, []).append(increment)
+
+            return [Increment(symbol, sum(increment.expression for increment in increments), context) for symbol, increments in increment_dict.items()]
+
+        # conjoin if statements with the same condition
+        if context.conjoin_sibling_if_statements:
+            n = len(resolved_if_list)
+            for i in range(n - 1, -1, -1):
+                check_resolved_if = resolved_if_list[i]
+                for resolved_if in resolved_if_list[:i]:
+                    try:
+                        equals = resolved_if.condition.equals(check_resolved_if.condition)
+                    except NotImplementedError:
+                        pass
+                    else:
+                        if equals:
+                            resolved_if.block.extend(check_resolved_if.block)
+                            resolved_if_list.pop(i)
+                            break
+
+
+        resolved_block = ResolvedBlock()
+
+        if context.merge_sibling_increment_statements:
+            resolved_block.extend(merge_increment(increment_list))
+        else:
+            resolved_block.extend(increment_list)
+
+        for resolved_if in resolved_if_list:
+            if context.merge_sibling_increment_statements:
+                resolved_if.block = merge_increment(resolved_if.block)
+            else:
+                resolved_if.block = resolved_if.block
+            resolved_block.append(resolved_if)
+
+        resolved_block.extend(resolved_for_list)
+
+        return resolved_block
+
+    def free_symbols(self) -> set[sympy.Symbol]:
+        """the symbols occurring in the bounds, conditions and increments, including the summation indices"""
+        free_symbols : set[sympy.Symbol] = set()
+        for statement in self:
+            if isinstance(statement, For):
+                free_symbols.update(*(inequality.free_symbols for inequality in statement.inequalities))
+                free_symbols.update(statement.block.free_symbols())
+            elif isinstance(statement, If):
+                free_symbols.update(statement.condition.free_symbols)
+                free_symbols.update(statement.block.free_symbols())
+            else:
+                free_symbols.update(statement.expression.free_symbols)
+        return free_symbols
+
+    def summation_indices(self) -> set[sympy.Symbol]:
+        summation_indices : set[sympy.Symbol] = set()
+        for statement in self:
+            if isinstance(statement, For):
+                summation_indices.add(statement.summation_index)
+            if isinstance(statement, For | If):
+                summation_indices.update(statement.block.summation_indices())
+        return summation_indices
+
+    def partition(self, context : TransformContext | None = None) -> PartitionBlock:
+        """the work done before the outermost loop reaches a bound, to cut its range into chunks of equal work"""
+        return PartitionBlock.from_statement_block(self, context)
+
+    def unrank(self, context : TransformContext | None = None) -> UnrankBlock:
+        """map a flat index to the tuple of loop indices of a counting block (r += 1)"""
+        return UnrankBlock.from_statement_block(self, context)
+
+    pass
+
+class ResolvedBlock(list[ResolvedIf | Increment | ResolvedFor]):
+    def eliminate_symbol_from_max_min(self, summation_index : sympy.Symbol, context : TransformContext | None = None) -> ResolvedBlock:
+        return ResolvedBlock(self.iter_eliminate_symbol_from_max_min(summation_index, context))
+
+    def iter_eliminate_symbol_from_max_min(self, summation_index : sympy.Symbol, context : TransformContext | None = None) -> typing.Iterator[ResolvedIf | Increment]:
+        """yields the branches of one statement after another, without materializing the cases of all statements"""
+        for resolved_statement in self:
+            yield from resolved_statement.iter_eliminate_symbol_from_max_min(summation_index, context = context)
+
+    def remove_redundant_inequalities(self, context : TransformContext | None = None) -> ResolvedBlock:
+        """drop implied inequalities from the conditions and the branches whose conditions contradict each other (also in loops)"""
+        if context is None:
+            context = TransformContext()
+
+        return_block = ResolvedBlock()
+        for resolved_statement in self:
+            if isinstance(resolved_statement, ResolvedIf):
+                return_block.extend(resolved_statement.remove_redundant_inequalities(context))
+            elif isinstance(resolved_statement, ResolvedFor) and isinstance(resolved_statement.block, ResolvedBlock):
+                return_block.append(ResolvedFor(resolved_statement.summation_index, resolved_statement.start, resolved_statement.end,
+                                                resolved_statement.block.remove_redundant_inequalities(context), resolved_statement.condition, resolved_statement.reason))
+            else:
+                return_block.append(resolved_statement)
+        return return_block
+
+    def merge_identical_branches(self, context : TransformContext | None = None) -> ResolvedBlock:
+        """
+        merge the branches which increment by the same expressions (also in loops)
+        two of them whose conditions differ in one mutually exclusive inequality each are merged into one branch if one of these inequalities always holds
+        the remaining mutually exclusive ones share their block under the disjunction of their conditions
+        """
+        if context is None:
+            context = TransformContext()
+
+        groups : dict[tuple[tuple[sympy.Symbol, typing.Any], ...], list[list[typing.Any]]] = {}
+        blocks : dict[tuple[tuple[sympy.Symbol, typing.Any], ...], list[Increment]] = {}
+        order : list[ResolvedIf | Increment | ResolvedFor | tuple[tuple[sympy.Symbol, typing.Any], ...]] = []
+        for resolved_statement in self:
+            if isinstance(resolved_statement, ResolvedIf):
+                key = tuple((increment.symbol, increment.expression) for increment in resolved_statement.block)
+                if key not in groups:
+                    order.append(key)
+                groups.setdefault(key, []).append(list(resolved_statement.condition.args) if isinstance(resolved_statement.condition, sympy.And) else [resolved_statement.condition])
+                blocks.setdefault(key, resolved_statement.block)
+            elif isinstance(resolved_statement, ResolvedFor) and isinstance(resolved_statement.block, ResolvedBlock):
+                order.append(ResolvedFor(resolved_statement.summation_index, resolved_statement.start, resolved_statement.end,
+                                         resolved_statement.block.merge_identical_branches(context), resolved_statement.condition, resolved_statement.reason))
+            else:
+                order.append(resolved_statement)
+
+        return_block = ResolvedBlock()
+        with context.timed("merge branches time"):
+            for statement in order:
+                if not isinstance(statement, tuple):
+                    return_block.append(statement)
+                    continue
+
+                conditions = ResolvedBlock._merge_complementary(groups[statement], context)
+                disjunctions : list[list[list[typing.Any]]] = []
+                for conjuncts in conditions:
+                    disjunction = next((disjunction for disjunction in disjunctions if all(context.assumptions.contradicts(conjuncts + other) for other in disjunction)), None)
+                    if disjunction is None:
+                        disjunctions.append([conjuncts])
+                    else:
+                        disjunction.append(conjuncts)
+                        context.count("or-guarded branches")
+
+                for disjunction in disjunctions:
+                    if len(disjunction) == 1:
+                        return_block.extend(ResolvedIf.from_condition(sympy.And(*disjunction[0]), blocks[statement], True, context))
+                    else:
+                        return_block.append(ResolvedIf(sympy.Or(*(sympy.And(*conjuncts) for conjuncts in disjunction)), blocks[statement]))
+        return return_block
+
+    @staticmethod
+    def _merge_complementary(conditions : list[list[typing.Any]], context : TransformContext) -> list[list[typing.Any]]:
+        """replace two conditions `c & a` and `c & b` by `c` as long as exactly one of a and b holds whenever c does"""
+        conditions = list(conditions)
+        merged = True
+        while merged:
+            merged = False
+            for i, j in itertools.combinations(range(len(conditions)), 2):
+                only_i = [conjunct for conjunct in conditions[i] if conjunct not in conditions[j]]
+                only_j = [conjunct for conjunct in conditions[j] if conjunct not in conditions[i]]
+                if len(only_i) != 1 or len(only_j) != 1:
+                    continue
+                common = [conjunct for conjunct in conditions[i] if conjunct in conditions[j]]
+                a, b = only_i[0], only_j[0]
+                if context.assumptions.contradicts(common + [a, b]) and context.assumptions.contradicts(common + [sympy.Not(a), sympy.Not(b)]):
+                    conditions[i] = common
+                    del conditions[j]
+                    context.count("merged branches")
+                    merged = True
+                    break
+        return conditions
+
+    def xreplace(self, substitutions : dict[sympy.Symbol, typing.Any]) -> ResolvedBlock:
+        """substitute symbols simultaneously in every condition, bound and increment"""
+        def replace(increments : list[Increment]) -> list[Increment]:
+            return [Increment(increment.symbol, increment.expression.xreplace(substitutions)) for increment in increments]
+
+        return_block = ResolvedBlock()
+        for resolved_statement in self:
+            if isinstance(resolved_statement, Increment):
+                return_block.extend(replace([resolved_statement]))
+            elif isinstance(resolved_statement, ResolvedIf):
+                return_block.extend(ResolvedIf.from_condition(resolved_statement.condition.xreplace(substitutions), replace(resolved_statement.block), True))
+            else:
+                assert isinstance(resolved_statement.block, ResolvedBlock), f"block of the loop over {resolved_statement.summation_index} is of unexpected type {type(resolved_statement.block)}"
+                condition = resolved_statement.condition.xreplace(substitutions)
+                if not isinstance(condition, boolalg.BooleanFalse):
+                    return_block.append(ResolvedFor(resolved_statement.summation_index, resolved_statement.start.xreplace(substitutions), resolved_statement.end.xreplace(substitutions),
+                                                    resolved_statement.block.xreplace(substitutions), condition, resolved_statement.reason))
+        return return_block
+
+    @staticmethod
+    def _expression_to_json(expression : typing.Any) -> dict[str, typing.Any] | list[typing.Any]:
+        # atoms as plain data, everything else as [class name, *arguments] in the order of expression.args
+        if isinstance(expression, sympy.Symbol):
+            return {"symbol" : expression.name, "assumptions" : expression.assumptions0}
+        if isinstance(expression, sympy.Rational):
+            return {"rational" : [int(expression.p), int(expression.q)]}
+        if isinstance(expression, boolalg.BooleanAtom):
+            return {"boolean" : bool(expression)}
+        if not expression.args:
+            raise ValueError(f"atom {expression} of type {type(expression).__name__} can't be stored")
+        return [type(expression).__name__, *map(ResolvedBlock._expression_to_json, expression.args)]
+
+    @staticmethod
+    def _expression_from_json(data : dict[str, typing.Any] | list[typing.Any], atoms : dict[str, typing.Any]) -> typing.Any:
+        """raises an AttributeError, KeyError, TypeError or ValueError if data isn't a stored expression, nothing is evaluated"""
+        if isinstance(data, dict):
+            key = json.dumps(data, sort_keys = True)
+            if key not in atoms:
+                if "symbol" in data:
+                    atoms[key] = sympy.Symbol(data["symbol"], **data["assumptions"])
+                elif "rational" in data:
+                    numerator, denominator = data["rational"]
+                    atoms[key] = sympy.Rational(int(numerator), int(denominator))
+                else:
+                    atoms[key] = sympy.true if data["boolean"] else sympy.false
+            return atoms[key]
+        cls = Binomial if data[0] == "Binomial" else getattr(sympy, data[0])
+        if not isinstance(cls, type) or not issubclass(cls, sympy.Basic):
+            raise TypeError(f"{data[0]} isn't an expression class")
+        args = [ResolvedBlock._expression_from_json(arg, atoms) for arg in data[1:]]
+        # the arguments are already canonical, evaluating them again is the expensive part of sympify(srepr(...))
+        if issubclass(cls, sympy.core.operations.AssocOp) and not issubclass(cls, sympy.core.operations.LatticeOp):
+            return cls._from_args(args)
+        return cls(*args, evaluate = False)
+
+    def to_json(self) -> list[dict[str, typing.Any]]:
+        """json serializable representation, expressions are trees of class names with symbols (name and assumptions), rationals and booleans as leaves"""
+        expression = ResolvedBlock._expression_to_json
+
+        def increments(block : list[Increment]) -> list[list[typing.Any]]:
+            return [[expression(increment.symbol), expression(increment.expression)] for increment in block]
+
+        data : list[dict[str, typing.Any]] = []
+        for statement in self:
+            if isinstance(statement, Increment):
+                data.append({"increment" : increments([statement])[0]})
+            elif isinstance(statement, ResolvedIf):
+                data.append({"if" : expression(statement.condition), "block" : increments(statement.block)})
+            else:
+                assert isinstance(statement.block, ResolvedBlock), f"block of the loop over {statement.summation_index} is of unexpected type {type(statement.block)}"
+                data.append({"for" : expression(statement.summation_index), "start" : expression(statement.start), "end" : expression(statement.end),
+                             "condition" : expression(statement.condition), "reason" : statement.reason, "block" : statement.block.to_json()})
+        return data
+
+    @staticmethod
+    def from_json(data : list[dict[str, typing.Any]], atoms : dict[str, typing.Any] | None = None) -> ResolvedBlock:
+        """inverse of to_json"""
+        if atoms is None:
+            atoms = {}
+
+        def expression(data : dict[str, typing.Any] | list[typing.Any]) -> typing.Any:
+            return ResolvedBlock._expression_from_json(data, atoms)
+
+        def increments(data : list[list[typing.Any]]) -> list[Increment]:
+            return [Increment(expression(symbol), expression(increment)) for symbol, increment in data]
+
+        resolved_block = ResolvedBlock()
+        for statement in data:
+            if "increment" in statement:
+                resolved_block.extend(increments([statement["increment"]]))
+            elif "if" in statement:
+                resolved_block.append(ResolvedIf(expression(statement["if"]), increments(statement["block"])))
+            else:
+                resolved_block.append(ResolvedFor(expression(statement["for"]), expression(statement["start"]), expression(statement["end"]),
+                                                  ResolvedBlock.from_json(statement["block"], atoms), expression(statement["condition"]), statement["reason"]))
+        return resolved_block
+
+    def cse(self, context : TransformContext | None = None) -> CSEBlock:
+        if context is None:
+            context = TransformContext()
+
+        block = self.remove_redundant_inequalities(context) if context.remove_redundant_inequalities else self
+        if context.merge_identical_branches:
+            block = block.merge_identical_branches(context)
+        return_block = CSEBlock()
+        # the results of dropped branches are still initialized
+        return_block.extend(Assignment(result_symbol, 0) for result_symbol in self._result_symbols())
+        with context.timed("cse time"):
+            return_block.extend(block._cse(sympy.numbered_symbols(), context))
+
+        return return_block
+
+    def _result_symbols(self) -> set[sympy.Symbol]:
+        result_symbols : set[sympy.Symbol] = set()
+
+        for statement in self:
+            if isinstance(statement, ResolvedIf):
+                result_symbols.update(increment.symbol for increment in statement.block)
+            elif isinstance(statement, ResolvedFor):
+                assert isinstance(statement.block, ResolvedBlock), f"block is of unexpected type {type(statement.block)}"
+                result_symbols.update(statement.block._result_symbols())
+            else:
+                result_symbols.add(statement.symbol)
+
+        return result_symbols
+
+    def _cse(self, cse_symbols : typing.Iterator[sympy.Symbol], context : TransformContext) -> CSEBlock:
+        """
+        eliminate common subexpressions without initializing the results
+        the block of a loop is handled separately because its subexpressions may depend on the summation index
+        """
+        expressions : list[typing.Any] = []
+
+        for statement in self:
+            if isinstance(statement, ResolvedIf):
+                expressions.append(statement.condition)
+                for increment in statement.block:
+                    expressions.append(increment.expression)
+            elif isinstance(statement, ResolvedFor):
+                expressions += [statement.condition, statement.start, statement.end]
+            else:
+                expressions.append(statement.expression)
+
+        if context.cse_chunk_size is not None and len(expressions) > context.cse_chunk_size:
+            replacements, reduced_expressions = ResolvedBlock._chunked_cse(expressions, cse_symbols, context)
+        else:
+            replacements, reduced_expressions = sympy.cse(expressions, cse_symbols)
+        assert isinstance(reduced_expressions, list)
+        context.count("cse temporaries", len(replacements))
+
+        return_block = CSEBlock()
+
+        if context.evaluate_common_subexpressions:
+            return_block.extend(Assignment(replacement[0], replacement[1]) for replacement in replacements)
+
+            for statement in self:
+                if isinstance(statement, ResolvedIf):
+                    resolved_condition = reduced_expressions.pop(0)
+                    assert isinstance(resolved_condition, ResolvedIf.Union | sympy.Or), f"resolved condition is of unexpected type {type(resolved_condition)}"
+                    increments = [Increment(increment.symbol, reduced_expressions.pop(0), context) for increment in statement.block]
+                    if isinstance(resolved_condition, sympy.Or):
+                        return_block.append(ResolvedIf(resolved_condition, increments))
+                    else:
+                        return_block.extend(ResolvedIf.from_condition(resolved_condition, increments, False, context))
+                elif isinstance(statement, ResolvedFor):
+                    assert isinstance(statement.block, ResolvedBlock), f"block is of unexpected type {type(statement.block)}"
+                    condition, start, end = reduced_expressions.pop(0), reduced_expressions.pop(0), reduced_expressions.pop(0)
+                    return_block.append(ResolvedFor(statement.summation_index, start, end, statement.block._cse(cse_symbols, context), condition, statement.reason))
+                else:
+                    return_block.append(Increment(statement.symbol, reduced_expressions.pop(0), context))
+        else:
+            for statement in self:
+                if isinstance(statement, ResolvedFor):
+                    assert isinstance(statement.block, ResolvedBlock), f"block is of unexpected type {type(statement.block)}"
+                    return_block.append(ResolvedFor(statement.summation_index, statement.start, statement.end, statement.block._cse(cse_symbols, context), statement.condition, statement.reason))
+                else:
+                    return_block.append(statement)
+
+        return return_block
+
+    @staticmethod
+    def _chunked_cse(expressions : list[typing.Any], cse_symbols : typing.Iterator[sympy.Symbol], context : TransformContext) -> tuple[list[tuple[sympy.Symbol, typing.Any]], list[typing.Any]]:
+        """
+        sympy.cse of chunks of cse_chunk_size expressions (in cse_processes processes)
+        the temporaries of a chunk are named after a symbol of cse_symbols (e.g. x3_0, x3_1, ...) so only temporaries equal to one of an earlier chunk have to be renamed
+        subexpressions occurring once in several chunks aren't found
+        """
+        chunk_size = typing.cast(int, context.cse_chunk_size)
+        chunks = [expressions[i : i + chunk_size] for i in range(0, len(expressions), chunk_size)]
+        excluded = frozenset().union(*(expression.free_symbols for expression in expressions))
+        prefixes = [f"{next(symbol for symbol in cse_symbols if symbol not in excluded).name}_" for _ in chunks]
+        context.count("cse chunks", len(chunks))
+        if context.cse_processes > 1:
+            with concurrent.futures.ProcessPoolExecutor(min(context.cse_processes, len(chunks))) as executor:
+                results = list(executor.map(ResolvedBlock._cse_chunk, chunks, prefixes, itertools.repeat(excluded)))
+        else:
+            results = [ResolvedBlock._cse_chunk(chunk, prefix, excluded) for chunk, prefix in zip(chunks, prefixes)]
+
+        replacements : list[tuple[sympy.Symbol, typing.Any]] = []
+        reduced_expressions : list[typing.Any] = []
+        temporaries : dict[typing.Any, sympy.Symbol] = {}
+        for chunk_replacements, chunk_reduced_expressions in results:
+            # temporaries of this chunk replaced by equal ones of earlier chunks
+            renaming : dict[sympy.Symbol, sympy.Symbol] = {}
+            def rename(expression : typing.Any) -> typing.Any:
+                return expression.xreplace(renaming) if renaming and not renaming.keys().isdisjoint(expression.free_symbols) else expression
+
+            for symbol, expression in chunk_replacements:
+                expression = rename(expression)
+                if expression in temporaries:
+                    renaming[symbol] = temporaries[expression]
+                    context.count("cse temporaries shared by chunks")
+                else:
+                    temporaries[expression] = symbol
+                    replacements.append((symbol, expression))
+            reduced_expressions += [rename(expression) for expression in chunk_reduced_expressions]
+        return replacements, reduced_expressions
+
+    @staticmethod
+    def _cse_chunk(expressions : list[typing.Any], prefix : str, excluded : frozenset[sympy.Symbol]) -> tuple[list[tuple[sympy.Symbol, typing.Any]], list[typing.Any]]:
+        replacements, reduced_expressions = sympy.cse(expressions, (symbol for symbol in sympy.numbered_symbols(prefix) if symbol not in excluded))
+        return replacements, list(reduced_expressions)
+
+    def chambers(self, max_chambers : int = 4096, context : TransformContext | None = None) -> ChamberBlock:
+        """dispatch the branches by the chamber of the parameters instead of evaluating every condition"""
+        return ChamberBlock.from_resolved_block(self, max_chambers, context)
+
+    def copy(self) -> ResolvedBlock:
+        """copy of the block and the blocks of its if and for statements, the increments and expressions are shared"""
+        resolved_block = ResolvedBlock()
+        for statement in self:
+            if isinstance(statement, ResolvedIf):
+                resolved_block.append(ResolvedIf(statement.condition, list(statement.block)))
+            elif isinstance(statement, ResolvedFor):
+                block = statement.block.copy() if isinstance(statement.block, ResolvedBlock) else statement.block
+                resolved_block.append(ResolvedFor(statement.summation_index, statement.start, statement.end, block, statement.condition, statement.reason))
+            else:
+                resolved_block.append(statement)
+        return resolved_block
+
+    def budget_report(self) -> list[str]:
+        """the reasons of all loops which were kept because the budget was exceeded"""
+        report : list[str] = []
+        for statement in self:
+            if isinstance(statement, ResolvedFor):
+                if statement.reason is not None:
+                    report.append(statement.reason)
+                if isinstance(statement.block, ResolvedBlock):
+                    report += statement.block.budget_report()
+        return report
+
+    pass
+
+class CSEBlock(list[ResolvedIf | Increment | ResolvedFor | Assignment]):
+    def dump_python(self) -> str:
+        return_string = self._dump_python()
+        # binomial coefficients of counted compositions
+        return ("import math\n\n" if "math." in return_string else "") + return_string
+
+    def _dump_python(self) -> str:
+        """the statements without the import of math, e.g. for the body of a loop or function"""
+        return_string = ""
+
+        for statement in self:
+            if isinstance(statement, Increment):
+                return_string += f"{sympy.pycode(statement.symbol)} += {sympy.pycode(statement.expression)}\n"
+
+            elif isinstance(statement, ResolvedIf):
+                return_string += f"if {sympy.pycode(statement.condition)}:\n"
+                for increment in statement.block:
+                    return_string += f"    {sympy.pycode(increment.symbol)} += {sympy.pycode(increment.expression)}\n"
+
+            elif isinstance(statement, ResolvedFor):
+                assert isinstance(statement.block, CSEBlock), f"block is of unexpected type {type(statement.block)}"
+                loop_string = f"for {sympy.pycode(statement.summation_index)} in range({sympy.pycode(statement.start)}, {sympy.pycode(statement.end)}):\n"
+                loop_string += textwrap.indent(statement.block._dump_python() or "pass\n", "    ")
+                if statement.reason is not None:
+                    return_string += f"# {statement.reason}\n"
+                if isinstance(statement.condition, boolalg.BooleanTrue):
+                    return_string += loop_string
+                else:
+                    return_string += f"if {sympy.pycode(statement.condition)}:\n"
+                    return_string += textwrap.indent(loop_string, "    ")
+
+            elif isinstance(statement, Assignment):
+                return_string += f"{sympy.pycode(statement.symbol)} = {sympy.pycode(statement.expr)}\n"
+  
+            else:
+                raise Exception(f"unexpected statement {statement}")
+
+        return return_string
+
+    def dump_cpp(self, integer_type : str = "long long", force_braces : bool = False, beginning_brace_on_same_line : bool = False) -> str:
+        return_string = ""
+
+        for statement in self:
+            if isinstance(statement, Increment):
+                return_string += f"{sympy.cxxcode(statement.symbol)} += {sympy.cxxcode(statement.expression)};\n"
+
+            elif isinstance(statement, ResolvedIf):
+                return_string += f"if ({sympy.cxxcode(statement.condition)})"
+                if len(statement.block) != 1 or force_braces:
+                    if beginning_brace_on_same_line:
+                        return_string += " "
+                    else:
+                        return_string += "\n"
+                    return_string += "{"
+                return_string += "\n"
+                for increment in statement.block:
+                    return_string += f"    {sympy.cxxcode(increment.symbol)} += {sympy.cxxcode(increment.expression)};\n"
+                if len(statement.block) != 1 or force_braces:
+                    return_string += "}\n"
+
+            elif isinstance(statement, ResolvedFor):
+                assert isinstance(statement.block, CSEBlock), f"block is of unexpected type {type(statement.block)}"
+                index = sympy.cxxcode(statement.summation_index)
+                loop_string = f"for ({integer_type} {index} = {sympy.cxxcode(statement.start)}; {index} < {sympy.cxxcode(statement.end)}; ++{index})"
+                loop_string += " {\n" if beginning_brace_on_same_line else "\n{\n"
+                loop_string += textwrap.indent(statement.block.dump_cpp(integer_type, force_braces, beginning_brace_on_same_line), "    ")
+                loop_string += "}\n"
+                if statement.reason is not None:
+                    return_string += f"// {statement.reason}\n"
+                if isinstance(statement.condition, boolalg.BooleanTrue):
+                    return_string += loop_string
+                else:
+                    return_string += f"if ({sympy.cxxcode(statement.condition)})"
+                    return_string += " {\n" if beginning_brace_on_same_line else "\n{\n"
+                    return_string += textwrap.indent(loop_string, "    ")
+                    return_string += "}\n"
+
+            elif isinstance(statement, Assignment):
+                return_string += f"{integer_type} {sympy.cxxcode(statement.expr, statement.symbol)}\n"
+  
+            else:
+                raise Exception(f"unexpected statement {statement}")
+
+        return return_string
+
+    pass
+
+
+class ChamberBlock:
+    """
+    a resolved block dispatched by chambers: a decision tree over the atomic conditions whose leaves are the feasible chambers
+    every leaf holds a single straight-line closed form (the sum of the increments of the branches containing the chamber)
+    only the atoms on the path to a leaf are evaluated, atoms implied by the path or not affecting the closed form are skipped
+    """
+    def __init__(self, increments : list[Increment], atoms : list[typing.Any], tree : typing.Any, context : TransformContext | None = None):
+        self.context = context if context is not None else TransformContext()
+        self.increments = increments
+        """increments which don't depend on the chamber"""
+        self.atoms = atoms
+        """the atomic conditions the tree branches on"""
+        self.tree = tree
+        """a leaf is a list of increments, an inner node a tuple of the index of its atom, the subtree if the atom is false and the subtree if it is true"""
+        return
+
+    @staticmethod
+    def _atom(literal : typing.Any) -> tuple[typing.Hashable, bool]:
+        """returns a key shared by the literal and its negation and whether the literal is the positive one"""
+        rows = LinearSystem.rows(literal)
+        if rows is not None and len(rows) == 1 and rows[0][0]:
+            row = rows[0]
+            if row[0][0][1] > 0:
+                return row, True
+            return LinearSystem.negate_row(row), False
+
+        if isinstance(literal, Inequality):
+            # e <= 0 or e < 0, the negation of (e, strict) is (-e, not strict)
+            if literal.rel_op in ("<", "<="):
+                difference = literal.lhs - literal.rhs
+            else:
+                difference = literal.rhs - literal.lhs
+            strict = literal.rel_op in ("<", ">")
+            if sympy.default_sort_key(difference) <= sympy.default_sort_key(-difference):
+                return (difference, strict), True
+            return (-difference, not strict), False
+
+        if isinstance(literal, sympy.Not):
+            return literal.args[0], False
+        return literal, True
+
+    @staticmethod
+    def from_resolved_block(resolved_block : ResolvedBlock, max_chambers : int = 4096, context : TransformContext | None = None) -> ChamberBlock:
+        if context is None:
+            context = TransformContext()
+
+        increments : list[Increment] = []
+        atom_keys : dict[typing.Hashable, int] = {}
+        atoms : list[typing.Any] = []
+        branches : list[tuple[dict[int, bool], list[Increment]]] = []
+
+        for statement in resolved_block:
+            if isinstance(statement, Increment):
+                increments.append(statement)
+                continue
+            assert isinstance(statement, ResolvedIf), f"chamber dispatch requires a resolved block without loops but got {type(statement)}"
+
+            literals : dict[int, bool] = {}
+            for literal in statement.condition.args if isinstance(statement.condition, sympy.And) else (statement.condition, ):
+                key, polarity = ChamberBlock._atom(literal)
+                if key not in atom_keys:
+                    atom_keys[key] = len(atoms)
+                    atoms.append(literal if polarity else sympy.Not(literal))
+                literals[atom_keys[key]] = polarity
+            branches.append((literals, statement.block))
+
+        # enumerate the feasible chambers depth first, atoms which don't affect the remaining branches are left undetermined
+        # max/min are replaced by symbols bounded by their arguments like in LinearSystem.contradicts, e.g. max(a, b) < c implies a < c
+        system, abstracted = context.assumptions._abstract(atoms)
+        atom_rows = [(LinearSystem.rows(sympy.Not(atom)), LinearSystem.rows(atom)) for atom in abstracted]
+        chamber_count = 0
+        def visit(system : LinearSystem, assignment : dict[int, bool], alive : list[int]) -> typing.Any:
+            nonlocal chamber_count
+            context.budget.check_time()
+            undetermined = [index for branch in alive for index in branches[branch][0] if index not in assignment]
+            if not undetermined:
+                chamber_count += 1
+                if chamber_count > max_chambers:
+                    raise Exception(f"more than {max_chambers} chambers")
+                sums : dict[sympy.Symbol, typing.Any] = {}
+                for branch in alive:
+                    for increment in branches[branch][1]:
+                        sums[increment.symbol] = sums.get(increment.symbol, 0) + increment.expression
+                return [(symbol, expression) for symbol, expression in sums.items() if expression != 0]
+
+            index = min(undetermined)
+            subtrees : list[typing.Any] = []
+            for value in (False, True):
+                new_system = system
+                rows = atom_rows[index][value]
+                if rows is not None:
+                    new_system = system.add(rows)
+                    if not new_system.is_feasible():
+                        subtrees.append(None)
+                        continue
+                subtrees.append(visit(new_system, assignment | {index : value}, [branch for branch in alive if branches[branch][0].get(index, value) == value]))
+
+            # the atom needn't be evaluated if the path implies it or if both of its subtrees are the same
+            false_tree, true_tree = subtrees
+            if false_tree is None or false_tree == true_tree:
+                return true_tree
+            if true_tree is None:
+                return false_tree
+            return (index, false_tree, true_tree)
+
+        tree = visit(system, {}, list(range(len(branches))))
+
+        def leaves_to_increments(tree : typing.Any) -> typing.Any:
+            if tree is None or isinstance(tree, list):
+                return [Increment(symbol, expression) for symbol, expression in tree or []]
+            index, false_tree, true_tree = tree
+            return (index, leaves_to_increments(false_tree), leaves_to_increments(true_tree))
+
+        return ChamberBlock(increments, atoms, leaves_to_increments(tree), context)
+
+    def _cse(self) -> tuple[set[sympy.Symbol], list[Assignment], list[Increment], typing.Any]:
+        """
+        returns result symbols, assignments, increments independent of the chamber and the tree with the reduced atoms and leaves
+        the common subexpressions are eliminated in the atoms and the increments of all chambers at once,
+        every temporary is assigned in the deepest node (or leaf) of the tree containing all of its uses
+        a leaf of the returned tree is a list of assignments and increments, a node a tuple of its assignments, its atom and its subtrees
+        """
+        result_symbols = {increment.symbol for increment in self.increments}
+        expressions : list[typing.Any] = [increment.expression for increment in self.increments]
+        def collect(tree : typing.Any) -> None:
+            if isinstance(tree, list):
+                result_symbols.update(increment.symbol for increment in tree)
+                expressions.extend(increment.expression for increment in tree)
+                return
+            index, false_tree, true_tree = tree
+            expressions.append(self.atoms[index])
+            collect(true_tree)
+            collect(false_tree)
+        collect(self.tree)
+
+        replacements : list[tuple[sympy.Symbol, typing.Any]] = []
+        if self.context.evaluate_common_subexpressions:
+            replacements, expressions = sympy.cse(expressions, sympy.numbered_symbols())
+        temporaries = {symbol : expression for symbol, expression in replacements}
+
+        def needed(expressions : list[typing.Any]) -> set[sympy.Symbol]:
+            """the temporaries the expressions depend on, directly or through other temporaries"""
+            symbols : set[sympy.Symbol] = set()
+            stack = [symbol for expression in expressions for symbol in expression.free_symbols if symbol in temporaries]
+            while stack:
+                symbol = stack.pop()
+                if symbol not in symbols:
+                    symbols.add(symbol)
+                    stack += [other for other in temporaries[symbol].free_symbols if other in temporaries]
+            return symbols
+
+        # the path of a node or leaf is the sequence of the values of the atoms above it
+        reduced = iter(expressions)
+        increments = [Increment(increment.symbol, next(reduced)) for increment in self.increments]
+        uses : dict[sympy.Symbol, list[tuple[bool, ...]]] = {symbol : [] for symbol in needed([increment.expression for increment in increments])}
+        def rebuild(tree : typing.Any, path : tuple[bool, ...]) -> typing.Any:
+            if isinstance(tree, list):
+                leaf = [Increment(increment.symbol, next(reduced)) for increment in tree]
+                expressions = [increment.expression for increment in leaf]
+            else:
+                _, false_tree, true_tree = tree
+                atom = next(reduced)
+                true_tree = rebuild(true_tree, path + (True, ))
+                expressions = [atom]
+            for symbol in needed(expressions):
+                uses.setdefault(symbol, []).append(path)
+            if isinstance(tree, list):
+                return leaf
+            return (atom, rebuild(false_tree, path + (False, )), true_tree)
+        tree = rebuild(self.tree, ())
+
+        placed : dict[tuple[bool, ...], list[Assignment]] = {}
+        for symbol, expression in replacements:
+            paths = uses.get(symbol, [()])
+            common = paths[0]
+            for path in paths[1:]:
+                common = common[:next((i for i, (a, b) in enumerate(zip(common, path)) if a != b), min(len(common), len(path)))]
+            placed.setdefault(common, []).append(Assignment(symbol, expression))
+
+        def attach(tree : typing.Any, path : tuple[bool, ...]) -> typing.Any:
+            assignments = placed.get(path, []) if path else []
+            if isinstance(tree, list):
+                return assignments + tree
+            atom, false_tree, true_tree = tree
+            return (assignments, atom, attach(false_tree, path + (False, )), attach(true_tree, path + (True, )))
+
+        return result_symbols, placed.get((), []), increments, attach(tree, ())
+
+    @staticmethod
+    def _branches(tree : typing.Any) -> list[tuple[typing.Any, typing.Any]]:
+        """
+        the if/elif chain of a node: pairs of condition and subtree, the last condition is None for the else branch (omitted if empty)
+        a node with assignments can't be an elif, it becomes the else branch
+        """
+        chain : list[tuple[typing.Any, typing.Any]] = []
+        while not isinstance(tree, list) and not (chain and tree[0]):
+            _, atom, false_tree, true_tree = tree
+            if true_tree == []:
+                atom, false_tree, true_tree = sympy.Not(atom), true_tree, false_tree
+            chain.append((atom, true_tree))
+            tree = false_tree
+        if tree:
+            chain.append((None, tree))
+        return chain
+
+    def dump_python(self) -> str:
+        result_symbols, assignments, increments, tree = self._cse()
+        return_string = ""
+
+        for result_symbol in result_symbols:
+            return_string += f"{sympy.pycode(result_symbol)} = 0\n"
+        for assignment in assignments:
+            return_string += f"{sympy.pycode(assignment.symbol)} = {sympy.pycode(assignment.expr)}\n"
+        for increment in increments:
+            return_string += f"{sympy.pycode(increment.symbol)} += {sympy.pycode(increment.expression)}\n"
+
+        def dump_statements(statements : list[Assignment | Increment]) -> str:
+            return "".join(f"{sympy.pycode(statement.symbol)} = {sympy.pycode(statement.expr)}\n" if isinstance(statement, Assignment) else
+                           f"{sympy.pycode(statement.symbol)} += {sympy.pycode(statement.expression)}\n" for statement in statements)
+
+        def dump(tree : typing.Any) -> str:
+            if isinstance(tree, list):
+                return dump_statements(tree) or "pass\n"
+            tree_string = dump_statements(tree[0])
+            for i, (condition, subtree) in enumerate(ChamberBlock._branches(tree)):
+                tree_string += "else:\n" if condition is None else f"{'elif' if i else 'if'} {sympy.pycode(condition)}:\n"
+                tree_string += textwrap.indent(dump(subtree), "    ")
+            return tree_string
+
+        if tree:
+            return_string += dump(tree)
+        # binomial coefficients of counted compositions
+        return ("import math\n\n" if "math." in return_string else "") + return_string
+
+    def dump_cpp(self, integer_type : str = "long long", beginning_brace_on_same_line : bool = False) -> str:
+        result_symbols, assignments, increments, tree = self._cse()
+        return_string = ""
+
+        for result_symbol in result_symbols:
+            return_string += f"{integer_type} {sympy.cxxcode(0, result_symbol)}\n"
+        for assignment in assignments:
+            return_string += f"{integer_type} {sympy.cxxcode(assignment.expr, assignment.symbol)}\n"
+        for increment in increments:
+            return_string += f"{sympy.cxxcode(increment.symbol)} += {sympy.cxxcode(increment.expression)};\n"
+
+        def dump_statements(statements : list[Assignment | Increment]) -> str:
+            return "".join(f"{integer_type} {sympy.cxxcode(statement.expr, statement.symbol)}\n" if isinstance(statement, Assignment) else
+                           f"{sympy.cxxcode(statement.symbol)} += {sympy.cxxcode(statement.expression)};\n" for statement in statements)
+
+        brace = " {\n" if beginning_brace_on_same_line else "\n{\n"
+        def dump(tree : typing.Any) -> str:
+            if isinstance(tree, list):
+                return dump_statements(tree)
+            tree_string = dump_statements(tree[0])
+            for i, (condition, subtree) in enumerate(ChamberBlock._branches(tree)):
+                tree_string += ("else" if condition is None else f"{'else if' if i else 'if'} ({sympy.cxxcode(condition)})") + brace
+                tree_string += textwrap.indent(dump(subtree), "    ") + "}\n"
+            return tree_string
+
+        if tree:
+            return_string += dump(tree)
+        return return_string
+
+    pass
+
+
+class PartitionBlock:
+    """
+    the closed form of the work done before the outermost loop reaches a bound (count_prefix), the work being the number of executed loop bodies
+    partition cuts the range of the outermost loop into chunks of equal work, e.g. for a thread pool
+    """
+    def __init__(self, parameters : list[sympy.Symbol], index : sympy.Symbol, start : typing.Any, end : typing.Any, bound : sympy.Symbol, count : CSEBlock, work : sympy.Symbol):
+        self.parameters = parameters
+        """the free symbols of the block, the arguments of the generated functions"""
+        self.index = index
+        self.start = start
+        self.end = end
+        self.bound = bound
+        """the first argument of count_prefix"""
+        self.count = count
+        """the work done before index reaches bound"""
+        self.work = work
+
+        reserved = {"chunks", "chunk", "start", "end", "total", "target", "bounds", "low", "high", "middle", "count_prefix", "partition"}
+        clashes = reserved & {str(symbol) for symbol in parameters}
+        assert len(clashes) == 0, f"symbols must not be named {', '.join(sorted(clashes))}"
+        return
+
+    @staticmethod
+    def _work(block : StatementBlock, work : sympy.Symbol) -> StatementBlock:
+        """the block with every loop body incrementing work and all other increments removed"""
+        work_block = StatementBlock()
+        for statement in block:
+            if isinstance(statement, For):
+                work_block.append(For(statement.summation_index, statement.inequalities, StatementBlock([*PartitionBlock._work(statement.block, work), Increment(work, sympy.Integer(1))])))
+            elif isinstance(statement, If):
+                work_block.append(If(statement.condition, PartitionBlock._work(statement.block, work)))
+        return work_block
+
+    @staticmethod
+    def from_statement_block(block : StatementBlock, context : TransformContext | None = None) -> PartitionBlock:
+        loops = [statement for statement in block if isinstance(statement, For)]
+        assert len(loops) == 1, f"block must contain exactly one outermost loop but contains {len(loops)}"
+        loop = loops[0]
+
+        free_symbols = block.free_symbols()
+        work = sympy.Symbol("work")
+        bound = sympy.Symbol(f"{loop.summation_index}_bound")
+        assert work not in free_symbols and bound not in free_symbols, f"symbols {work} and {bound} are reserved"
+
+        start, end, remaining = For._split_inequalities(loop.summation_index, typing.cast(list[In_Equality], loop.inequalities))
+        assert len(remaining) == 0, f"for statement can't have from {loop.summation_index} independant inequalities but has {remaining}"
+
+        work_loop = PartitionBlock._work(StatementBlock([loop]), work)[0]
+        assert isinstance(work_loop, For)
+        count = work_loop.prefix_count(bound, context)
+
+        parameters = sorted(free_symbols - block.summation_indices(), key = str)
+        return PartitionBlock(parameters, loop.summation_index, start, end, bound, count, work)
+
+    def dump_python(self) -> str:
+        # the leading parameter is part of the lists so there's no trailing comma without parameters
+        parameters = [sympy.pycode(parameter) for parameter in self.parameters]
+        def count_prefix(bound : str) -> str:
+            return f"count_prefix({', '.join([bound] + parameters)})"
+        return_string = f"def {count_prefix(sympy.pycode(self.bound))}:\n"
+        return_string += textwrap.indent(self.count._dump_python(), "    ")
+        return_string += f"    return round({sympy.pycode(self.work)})\n\n"
+        return_string += f"def partition({', '.join(['chunks'] + parameters)}):\n"
+        return_string += f"    start = {sympy.pycode(self.start)}\n"
+        return_string += f"    end = max(start, {sympy.pycode(self.end)})\n"
+        return_string += f"    total = {count_prefix('end')}\n"
+        return_string += "    bounds = [start]\n"
+        return_string += "    for chunk in range(1, chunks):\n"
+        return_string += "        target = total * chunk // chunks\n"
+        return_string += "        low, high = bounds[-1], end\n"
+        return_string += "        while low < high:\n"
+        return_string += "            middle = (low + high) // 2\n"
+        return_string += f"            if {count_prefix('middle')} < target:\n"
+        return_string += "                low = middle + 1\n"
+        return_string += "            else:\n"
+        return_string += "                high = middle\n"
+        return_string += "        bounds.append(low)\n"
+        return_string += "    bounds.append(end)\n"
+        return_string += "    return bounds\n"
+        # binomial coefficients of counted compositions
+        return ("import math\n\n" if "math." in return_string else "") + return_string
+
+    def dump_cpp(self, integer_type : str = "long long") -> str:
+        # the leading parameter is part of the lists so there's no trailing comma without parameters
+        parameters = [f"{integer_type} {sympy.cxxcode(parameter)}" for parameter in self.parameters]
+        arguments = [sympy.cxxcode(parameter) for parameter in self.parameters]
+        def count_prefix(bound : str) -> str:
+            return f"count_prefix({', '.join([bound] + arguments)})"
+        return_string = f"{integer_type} count_prefix({', '.join([f'{integer_type} {sympy.cxxcode(self.bound)}'] + parameters)})\n{{\n"
+        return_string += textwrap.indent(self.count.dump_cpp(integer_type), "    ")
+        return_string += f"    return {sympy.cxxcode(self.work)};\n}}\n\n"
+        return_string += f"std::vector<{integer_type}> partition({', '.join([f'{integer_type} chunks'] + parameters)})\n{{\n"
+        return_string += f"    const {integer_type} start = {sympy.cxxcode(self.start)};\n"
+        return_string += f"    const {integer_type} end = std::max(start, ({integer_type})({sympy.cxxcode(self.end)}));\n"
+        return_string += f"    const {integer_type} total = {count_prefix('end')};\n"
+        return_string += f"    std::vector<{integer_type}> bounds{{start}};\n"
+        return_string += f"    for ({integer_type} chunk = 1; chunk < chunks; ++chunk)\n    {{\n"
+        return_string += f"        const {integer_type} target = total * chunk / chunks;\n"
+        return_string += f"        {integer_type} low = bounds.back(), high = end;\n"
+        return_string += "        while (low < high)\n        {\n"
+        return_string += f"            const {integer_type} middle = low + (high - low) / 2;\n"
+        return_string += f"            if ({count_prefix('middle')} < target)\n                low = middle + 1;\n            else\n                high = middle;\n"
+        return_string += "        }\n"
+        return_string += "        bounds.push_back(low);\n"
+        return_string += "    }\n"
+        return_string += "    bounds.push_back(end);\n"
+        return_string += "    return bounds;\n}\n"
+        return return_string
+
+    pass
+
+class UnrankBlock:
+    """
+    maps a flat index (the rank) to the tuple of loop indices of the rank-th iteration which reaches the increment of a counting block (r += 1)
+    the prefix count of every loop level (the number of iterations before the index of this level reaches a bound) is transformed into a closed form,
+    the index is found by a binary search over it
+    threads can use it to find where their slice of a preallocated output starts
+    """
+    def __init__(self, parameters : list[sympy.Symbol], levels : list[tuple[sympy.Symbol, typing.Any, typing.Any, sympy.Symbol, CSEBlock]], result : sympy.Symbol):
+        self.parameters = parameters
+        """the free symbols of the block, the arguments of the unrank function after the rank"""
+        self.levels = levels
+        """(index, start, end, bound, prefix count) per loop level from the outermost to the innermost loop, the prefix count depends on bound"""
+        self.result = result
+        """the counter incremented by the block"""
+
+        reserved = {"rank", "low", "high", "middle"} | {f"count_{index}" for index, *_ in levels}
+        clashes = reserved & {str(symbol) for symbol in parameters + [index for index, *_ in levels]}
+        assert len(clashes) == 0, f"symbols must not be named {', '.join(sorted(clashes))}"
+        return
+
+    @staticmethod
+    def _loops(block : StatementBlock) -> tuple[list[For], sympy.Symbol]:
+        """
+        the chain of nested loops and the counter incremented by the innermost one
+        every loop body (through if statements) must contain exactly one loop or only increments
+        """
+        loops : list[For] = []
+        while True:
+            inner_loops : list[For] = []
+            increments : list[Increment] = []
+            statements = list(block)
+            while statements:
+                statement = statements.pop()
+                if isinstance(statement, If):
+                    statements.extend(statement.block)
+                elif isinstance(statement, For):
+                    inner_loops.append(statement)
+                else:
+                    increments.append(statement)
+
+            if len(inner_loops) == 0:
+                assert len(loops) != 0, "block must contain a loop"
+                assert all(increment.expression == 1 for increment in increments) and len({increment.symbol for increment in increments}) == 1, \
+                    f"the innermost loop must only increment a single counter by 1 but increments {', '.join(f'{increment.symbol} += {increment.expression}' for increment in increments)}"
+                return loops, increments[0].symbol
+
+            assert len(inner_loops) == 1, f"loops must be nested but there are {len(inner_loops)} loops on the same level"
+            assert len(increments) == 0, "only the innermost loop may contain increments"
+            loops.append(inner_loops[0])
+            block = inner_loops[0].block
+
+    @staticmethod
+    def from_statement_block(block : StatementBlock, context : TransformContext | None = None) -> UnrankBlock:
+        if context is None:
+            context = TransformContext()
+
+        loops, result = UnrankBlock._loops(block)
+        free_symbols = block.free_symbols()
+
+        levels = []
+        for loop in loops:
+            index = loop.summation_index
+            start, end, remaining = For._split_inequalities(index, typing.cast(list[In_Equality], loop.inequalities))
+            assert len(remaining) == 0, f"for statement can't have from {index} independant inequalities but has {remaining}"
+
+            bound = sympy.Symbol(f"{index}_bound")
+            assert bound not in free_symbols, f"symbol {bound} is reserved"
+            levels.append((index, start, end, bound, loop.prefix_count(bound, context)))
+
+        parameters = sorted(free_symbols - block.summation_indices(), key = str)
+        return UnrankBlock(parameters, levels, result)
+
+    def dump_python(self, function_name : str = "unrank") -> str:
+        result = sympy.pycode(self.result)
+        return_string = f"def {function_name}({', '.join(['rank'] + [sympy.pycode(parameter) for parameter in self.parameters])}):\n"
+        for index, start, end, bound, count in self.levels:
+            index = sympy.pycode(index)
+            return_string += f"    def count_{index}({sympy.pycode(bound)}):\n"
+            return_string += textwrap.indent(count._dump_python(), "        ")
+            return_string += f"        return round({result})\n"
+            return_string += f"    low, high = {sympy.pycode(start)}, {sympy.pycode(end)}\n"
+            return_string += "    while high - low > 1:\n"
+            return_string += "        middle = (low + high) // 2\n"
+            return_string += f"        if count_{index}(middle) <= rank:\n"
+            return_string += "            low = middle\n"
+            return_string += "        else:\n"
+            return_string += "            high = middle\n"
+            return_string += f"    {index} = low\n"
+            return_string += f"    rank -= count_{index}({index})\n"
+        indices = [sympy.pycode(index) for index, *_ in self.levels]
+        return_string += f"    return ({', '.join(indices)}{',' if len(indices) == 1 else ''})\n"
+        # binomial coefficients of counted compositions
+        return ("import math\n\n" if "math." in return_string else "") + return_string
+
+    def dump_cpp(self, integer_type : str = "long long", function_name : str = "unrank") -> str:
+        result = sympy.cxxcode(self.result)
+        parameters = ", ".join([f"{integer_type} rank"] + [f"{integer_type} {sympy.cxxcode(parameter)}" for parameter in self.parameters])
+        return_string = f"std::array<{integer_type}, {len(self.levels)}> {function_name}({parameters})\n{{\n"
+        return_string += f"    {integer_type} low, high, middle;\n"
+        for index, start, end, bound, count in self.levels:
+            index = sympy.cxxcode(index)
+            return_string += f"    auto count_{index} = [&]({integer_type} {sympy.cxxcode(bound)}) -> {integer_type}\n    {{\n"
+            return_string += textwrap.indent(count.dump_cpp(integer_type), "        ")
+            return_string += f"        return {result};\n    }};\n"
+            return_string += f"    low = {sympy.cxxcode(start)};\n"
+            return_string += f"    high = {sympy.cxxcode(end)};\n"
+            return_string += "    while (high - low > 1)\n    {\n"
+            return_string += "        middle = low + (high - low) / 2;\n"
+            return_string += f"        if (count_{index}(middle) <= rank)\n            low = middle;\n        else\n            high = middle;\n"
+            return_string += "    }\n"
+            return_string += f"    const {integer_type} {index} = low;\n"
+            return_string += f"    rank -= count_{index}({index});\n"
+        return_string += f"    return {{{', '.join(sympy.cxxcode(index) for index, *_ in self.levels)}}};\n}}\n"
+        return return_string
+
+    pass
+
+class Python:
+    @staticmethod
+    def _parse_block(stmts : list[ast.stmt], sympy_local_dict : dict[str, sympy.Symbol] | None, sum_indices : set[sympy.Symbol],
+                     results : set[sympy.Symbol], constants : dict[sympy.Symbol, typing.Any], context : TransformContext) -> StatementBlock:
+        
+        sum_indices = sum_indices.copy()
+        results = results.copy()
+        constants = constants.copy()
+        
+        return_block = StatementBlock()
+        for stmt in stmts:
+
+            if isinstance(stmt, ast.If):
+                condition_string = ast.unparse(stmt.test).replace("&&", "&").replace("||", "|")
+
+                condition = sympy.parse_expr(condition_string, sympy_local_dict).subs(constants)
+                If_ = If(condition, Python._parse_block(stmt.body, sympy_local_dict, sum_indices, results, constants, context), context)
+                return_block.append(If_)
+
+                if len(stmt.orelse) != 0:
+                    return_block.append(If_.negate(Python._parse_block(stmt.orelse, sympy_local_dict, sum_indices, results, constants, context), context))
+
+            elif isinstance(stmt, ast.For):
+                var = stmt.target
+                assert isinstance(var, ast.Name), "the target of the for loop must be a variable"
+                sum_index = sympy.parse_expr(ast.unparse(var), sympy_local_dict)
+                assert sum_index not in sum_indices, f"can't assign to a summation index at line {stmt.lineno}: '{ast.unparse(stmt)}'"
+                assert sum_index not in constants, f"can't reassign to this constant at line {stmt.lineno}: '{ast.unparse(stmt)}'"
+                assert sum_index not in results, f"can't reassign to this result at line {stmt.lineno}: '{ast.unparse(stmt)}'"
+                sum_indices.add(sum_index)
+
+                rng = stmt.iter
+                assert isinstance(rng, ast.Call), "the expression must be a function call"
+                assert isinstance(rng.func, ast.Name) and rng.func.id == 'range', "the function called must be 'range'"
+                assert len(rng.args) == 2, "the call to 'range' must have exactly two arguments"
+                lower = sympy.parse_expr(ast.unparse(rng.args[0]), sympy_local_dict).subs(constants)
+                upper = sympy.parse_expr(ast.unparse(rng.args[1]), sympy_local_dict).subs(constants)
+                
+                lt : typing.Any = sympy.LessThan(lower, sum_index)
+                slt : typing.Any = sympy.StrictLessThan(sum_index, upper)
+                assert isinstance(lt, Inequality) and isinstance(slt, Inequality), f"range must be a range but is {lt} and {slt}"
+                
+                return_block.append(For(sum_index, [lt, slt], Python._parse_block(stmt.body, sympy_local_dict, sum_indices, results, constants, context)))
+
+            elif isinstance(stmt, ast.Assign):  # =
+                assert len(stmt.targets) == 1, "can only assign to one variable at a time"
+
+                target = stmt.targets[0]
+                assert isinstance(target, ast.Name), "the target of the for loop must be a variable"
+
+                symbol = sympy.parse_expr(ast.unparse(target), sympy_local_dict)
+                assert symbol not in sum_indices, f"can't assign to a summation index at line {stmt.lineno}: '{ast.unparse(stmt)}'"
+                assert symbol not in constants, f"can't reassign to this constant at line {stmt.lineno}: '{ast.unparse(stmt)}'"
+                assert symbol not in results, f"can't reassign to this result at line {stmt.lineno}: '{ast.unparse(stmt)}'"
+
+                expression = sympy.parse_expr(ast.unparse(stmt.value), sympy_local_dict).subs(constants)
+                constants[symbol] = expression
+
+            elif isinstance(stmt, ast.AugAssign): # +=
+                assert isinstance(stmt.op, ast.Add)
+                assert isinstance(stmt.target, ast.Name), "the target of the for loop must be a variable"
+
+                result_symbol = sympy.parse_expr(ast.unparse(stmt.target), sympy_local_dict)
+                assert result_symbol not in sum_indices, f"can't assign to a summation index at line {stmt.lineno}: '{ast.unparse(stmt)}'"
+                assert result_symbol not in constants, f"can't increment this constant at line {stmt.lineno}: '{ast.unparse(stmt)}'"
+                results.add(result_symbol)
+
+                expression = sympy.parse_expr(ast.unparse(stmt.value), sympy_local_dict).subs(constants)
+
+                return_block.append(Increment(result_symbol, expression, context))
+
+            elif isinstance(stmt, ast.Pass):
+                pass
+
+            else:
+                raise Exception(f"unknown statement at line {stmt.lineno}: '{ast.unparse(stmt)}'")
+
+            pass
+        
+        return return_block
+
+    @staticmethod
+    def parse(string : str, sympy_local_dict : dict[str, sympy.Symbol] | None = None, context : TransformContext | None = None) -> StatementBlock:
+        if context is None:
+            context = TransformContext()
+        return Python._parse_block(ast.parse(string).body, sympy_local_dict, set(), set(), dict(), context)
+
+    pass
+
+def transform(source : str, settings : dict[str, typing.Any] | None = None, outputs : list[str] | None = None,
+              cpp_options : dict[str, typing.Any] | None = None, cache : TransformCache | None = None) -> dict[str, typing.Any]:
+    """transform a snippet, returns the requested outputs ('python', 'cpp', both by default), the budget report, the metrics and the time it took"""
+    if settings is None:
+        settings = {}
+    if outputs is None:
+        outputs = ["python", "cpp"]
+    if cpp_options is None:
+        cpp_options = {}
+    for output in outputs:
+        if output not in ("python", "cpp"):
+            raise ValueError(f"unknown output '{output}'")
+
+    start_time = time.perf_counter()
+    context = TransformContext(**(settings | {"print_info" : False}), cache = cache)
+    cse = Python.parse(source, context = context).resolve(context).cse(context)
+
+    result : dict[str, typing.Any] = {"budget_report" : context.budget.report, "metrics" : context.metrics, "cached" : False}
+    if "python" in outputs:
+        result["python"] = cse.dump_python()
+    if "cpp" in outputs:
+        result["cpp"] = cse.dump_cpp(**cpp_options)
+    result["time"] = time.perf_counter() - start_time
+    return result
+
+class TransformServer:
+    """
+    long-lived transformation service speaking JSON-RPC 2.0 with one message per line (on stdin/stdout or a Unix socket)
+    keeps sympy warm and shares a TransformCache (summations and complete results) between all requests
+    """
+    def __init__(self, max_workers : int = 4, max_cache_entries : int | None = 100000):
+        self.cache = TransformCache(max_cache_entries)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+        return
+
+    def transform(self, source : str, settings : dict[str, typing.Any] | None = None, outputs : list[str] | None = None,
+                  cpp_options : dict[str, typing.Any] | None = None) -> dict[str, typing.Any]:
+        """transform a snippet, returns the requested outputs ('python', 'cpp', both by default), the budget report and the metrics"""
+        if settings is None:
+            settings = {}
+        if outputs is None:
+            outputs = ["python", "cpp"]
+        if cpp_options is None:
+            cpp_options = {}
+        key = ("transform", source, json.dumps(settings, sort_keys = True), tuple(outputs), json.dumps(cpp_options, sort_keys = True))
+        result = self.cache.get(key)
+        if result is not None:
+            return result | {"cached" : True}
+
+        result = transform(source, settings, outputs, cpp_options, self.cache)
+        # a result cut short by a budget depends on the load of the machine, the next request may get further
+        if not result["budget_report"]:
+            self.cache.set(key, result)
+        return result
+
+    @staticmethod
+    def _check_transform(source : typing.Any, settings : typing.Any = None, outputs : typing.Any = None, cpp_options : typing.Any = None) -> None:
+        """raises a TypeError or ValueError if the parameters of a transform request are invalid"""
+        if not isinstance(source, str):
+            raise TypeError("source must be a string")
+        if settings is not None:
+            # the server mustn't read or write files chosen by a client
+            if not isinstance(settings, dict) or "cache" in settings or "checkpoint_dir" in settings:
+                raise TypeError("settings must be an object of arguments of TransformContext except cache and checkpoint_dir")
+            TransformContext.check_settings(settings)
+        if outputs is not None:
+            if not isinstance(outputs, list) or any(output not in ("python", "cpp") for output in outputs):
+                raise ValueError("outputs must be a list of 'python' and 'cpp'")
+        if cpp_options is not None:
+            if not isinstance(cpp_options, dict):
+                raise TypeError("cpp_options must be an object of arguments of dump_cpp")
+            inspect.signature(CSEBlock.dump_cpp).bind(None, **cpp_options)
+
+    def handle(self, line : str) -> typing.Optional[str]:
+        """handle one JSON-RPC message, returns the response (None for notifications)"""
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as exception:
+            return json.dumps({"jsonrpc" : "2.0", "id" : None, "error" : {"code" : -32700, "message" : str(exception)}})
+
+        request_id = request.get("id") if isinstance(request, dict) else None
+        def error(code : int, message : str) -> str:
+            return json.dumps({"jsonrpc" : "2.0", "id" : request_id, "error" : {"code" : code, "message" : message}})
+
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            return error(-32600, "invalid request")
+
+        method = request["method"]
+        params = request.get("params", {})
+        if method == "transform":
+            function : typing.Callable[..., typing.Any] = self.transform
+        elif method == "stats":
+            function = lambda: {"cache_entries" : len(self.cache)}
+        else:
+            return error(-32601, f"method '{method}' not found")
+
+        # invalid parameters are detected before the call, every exception raised by the call is an internal error
+        try:
+            arguments = inspect.signature(function).bind(**params) if isinstance(params, dict) else inspect.signature(function).bind(*params)
+            if method == "transform":
+                TransformServer._check_transform(*arguments.args, **arguments.kwargs)
+        except (TypeError, ValueError) as exception:
+            return error(-32602, str(exception))
+
+        try:
+            result = function(*arguments.args, **arguments.kwargs)
+        except Exception as exception:
+            return error(-32603, f"{type(exception).__name__}: {exception}")
+
+        if "id" not in request:
+            return None
+        return json.dumps({"jsonrpc" : "2.0", "id" : request_id, "result" : result})
+
+    def serve_stdio(self, input : typing.TextIO = sys.stdin, output : typing.TextIO = sys.stdout) -> None:
+        """serve requests from input until it is closed, responses are written in the order they complete"""
+        # only the number of pending requests is kept, not their futures
+        condition = threading.Condition()
+        pending = 0
+        def respond(future : concurrent.futures.Future[typing.Optional[str]]) -> None:
+            nonlocal pending
+            response = future.result()
+            with condition:
+                if response is not None:
+                    output.write(response + "\n")
+                    output.flush()
+                pending -= 1
+                condition.notify_all()
+
+        for line in input:
+            if line.strip():
+                with condition:
+                    pending += 1
+                self._executor.submit(self.handle, line).add_done_callback(respond)
+        with condition:
+            condition.wait_for(lambda: pending == 0)
+
+    def serve_unix(self, path : str) -> None:
+        """serve requests on a Unix socket, every connection is handled by its own thread"""
+        server = self
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                for line in self.rfile:
+                    if line.strip():
+                        response = server._executor.submit(server.handle, line.decode()).result()
+                        if response is not None:
+                            self.wfile.write(response.encode() + b"\n")
+                            self.wfile.flush()
+
+        with socketserver.ThreadingUnixStreamServer(path, Handler) as unix_server:
+            unix_server.serve_forever()
+
+    pass
+
+
+class ResultCache:
+    """
+    on-disk cache of transformation results, one json file per snippet, settings and outputs
+    the key includes a hash of this file so results of other versions of the algorithm aren't reused
+    """
+    def __init__(self, directory : str):
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents = True, exist_ok = True)
+        return
+
+    @staticmethod
+    @functools.cache
+    def _version() -> str:
+        return hashlib.sha256(pathlib.Path(__file__).read_bytes()).hexdigest()
+
+    def _path(self, source : str, settings : dict[str, typing.Any], outputs : list[str], cpp_options : dict[str, typing.Any]) -> pathlib.Path:
+        key = json.dumps([ResultCache._version(), source, settings, sorted(outputs), cpp_options], sort_keys = True)
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def get(self, source : str, settings : dict[str, typing.Any], outputs : list[str], cpp_options : dict[str, typing.Any]) -> dict[str, typing.Any] | None:
+        try:
+            return json.loads(self._path(source, settings, outputs, cpp_options).read_text())
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def set(self, source : str, settings : dict[str, typing.Any], outputs : list[str], cpp_options : dict[str, typing.Any], result : dict[str, typing.Any]) -> None:
+        # write to a temporary file first so concurrent runs never see half written results
+        path = self._path(source, settings, outputs, cpp_options)
+        temporary_path = path.with_suffix(f".{os.getpid()}.tmp")
+        temporary_path.write_text(json.dumps(result))
+        os.replace(temporary_path, path)
+
+    pass
+
+class Checkpoints:
+    """
+    on-disk checkpoints of resolved loop levels, one json file per loop (including its body), settings and assumptions
+    like ResultCache the key includes a hash of this file
+    """
+    def __init__(self, directory : str):
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents = True, exist_ok = True)
+        return
+
+    def _path(self, loop : For, context : TransformContext) -> pathlib.Path:
+        assumptions = sorted(map(str, context.assumptions.rows))
+        key = json.dumps([ResultCache._version(), sympy.srepr(loop.subtree_key()), context.settings(), assumptions], sort_keys = True)
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def get(self, loop : For, context : TransformContext) -> ResolvedBlock | None:
+        try:
+            return ResolvedBlock.from_json(json.loads(self._path(loop, context).read_text()))
+        except (OSError, json.JSONDecodeError, AttributeError, KeyError, IndexError, TypeError, ValueError):
+            # a checkpoint which can't be read is a miss, e.g. one naming a class this version of sympy doesn't have
+            return None
+
+    def set(self, loop : For, context : TransformContext, resolved_block : ResolvedBlock) -> bool:
+        """returns whether the checkpoint was saved, it isn't if the block contains an atom which can't be stored (e.g. a float)"""
+        try:
+            data = json.dumps(resolved_block.to_json())
+        except ValueError:
+            return False
+        # write to a temporary file first so an interrupted run never leaves a half written checkpoint
+        path = self._path(loop, context)
+        temporary_path = path.with_suffix(f".{os.getpid()}.tmp")
+        temporary_path.write_text(data)
+        os.replace(temporary_path, path)
+        return True
+
+    pass
+
+class CommandLine:
+    """
+    python loop_to_constant.py [options] files...
+    transforms every file, writes the results next to it (or into --output-dir) and prints timing and code size statistics
+    """
+    suffixes = {"python" : "_constant.py", "cpp" : "_constant.cpp"}
+    """suffixes of the output files"""
+
+    @staticmethod
+    def parse_arguments(argv : list[str]) -> argparse.Namespace:
+        parser = argparse.ArgumentParser(prog = "loop_to_constant.py", description = "transform loops into equivalent code of constant time complexity")
+        parser.add_argument("files", nargs = "*", help = "files containing python snippets to transform")
+        parser.add_argument("--python", action = "store_true", help = "write python output (default if neither --python nor --cpp is given)")
+        parser.add_argument("--cpp", action = "store_true", help = "write c++ output")
+        parser.add_argument("-o", "--output-dir", help = "directory for the output files (default: next to the input file)")
+        parser.add_argument("-j", "--jobs", type = int, default = 1, help = "number of files transformed in parallel")
+        parser.add_argument("--cache-dir", default = ".loop_to_constant_cache", help = "directory of the result cache")
+        parser.add_argument("--no-cache", action = "store_true", help = "neither read nor write the result cache")
+        parser.add_argument("--set", action = "append", default = [], metavar = "NAME=VALUE", help = "setting of TransformContext, e.g. --set simplify_dnf=False")
+        parser.add_argument("--integer-type", default = "long long", help = "integer type of the c++ output")
+        parser.add_argument("--serve", nargs = "?", const = "", metavar = "SOCKET", help = "run the JSON-RPC server on stdin/stdout or on a Unix socket")
+        return parser.parse_args(argv)
+
+    @staticmethod
+    def parse_settings(assignments : list[str]) -> dict[str, typing.Any]:
+        settings = {}
+        for assignment in assignments:
+            name, separator, value = assignment.partition("=")
+            if not separator:
+                raise ValueError(f"setting '{assignment}' isn't of the form NAME=VALUE")
+            settings[name.strip()] = ast.literal_eval(value.strip())
+        TransformContext.check_settings(settings)  # fail early on unknown settings and values of the wrong type
+        return settings
+
+    @staticmethod
+    def output_stem(path : str, output_dir : str | None) -> pathlib.Path:
+        """the path of the output files of path without their suffix"""
+        input_path = pathlib.Path(path)
+        return (pathlib.Path(output_dir) if output_dir else input_path.parent) / input_path.stem
+
+    @staticmethod
+    def collisions(paths : list[str], output_dir : str | None) -> dict[str, str]:
+        """error messages for the input files whose output files would overwrite those of another input file"""
+        inputs : dict[pathlib.Path, set[pathlib.Path]] = {}
+        for path in paths:
+            inputs.setdefault(CommandLine.output_stem(path, output_dir).resolve(), set()).add(pathlib.Path(path).resolve())
+        errors = {}
+        for path in paths:
+            others = inputs[CommandLine.output_stem(path, output_dir).resolve()] - {pathlib.Path(path).resolve()}
+            if others:
+                errors[path] = f"its output files would overwrite those of {', '.join(sorted(map(str, others)))}"
+        return errors
+
+    @staticmethod
+    def main(argv : list[str]) -> int:
+        """run the command line interface, returns the exit code"""
+        arguments = CommandLine.parse_arguments(argv)
+        if arguments.serve is not None:
+            if arguments.serve:
+                TransformServer(max(arguments.jobs, 1)).serve_unix(arguments.serve)
+            else:
+                TransformServer(max(arguments.jobs, 1)).serve_stdio()
+            return 0
+
+        try:
+            settings = CommandLine.parse_settings(arguments.set)
+        except (TypeError, ValueError, SyntaxError) as exception:
+            print(f"invalid setting: {exception}", file = sys.stderr)
+            return 2
+        outputs = [output for output in CommandLine.suffixes if getattr(arguments, output)] or ["python"]
+        cpp_options = {"integer_type" : arguments.integer_type}
+        cache = None if arguments.no_cache else ResultCache(arguments.cache_dir)
+
+        sources : dict[str, str] = {}
+        results : dict[str, dict[str, typing.Any]] = {}
+        errors = CommandLine.collisions(arguments.files, arguments.output_dir)
+        pending = []
+        for path in arguments.files:
+            if path in errors:
+                continue
+            try:
+                sources[path] = pathlib.Path(path).read_text()
+            except OSError as exception:
+                errors[path] = str(exception)
+                continue
+            result = cache.get(sources[path], settings, outputs, cpp_options) if cache else None
+            if result is None:
+                pending.append(path)
+            else:
+                results[path] = result | {"cached" : True}
+
+        def finish(path : str, result : dict[str, typing.Any]) -> None:
+            results[path] = result
+            # a result cut short by a budget may get further on the next run
+            if cache and not result["budget_report"]:
+                cache.set(sources[path], settings, outputs, cpp_options, result)
+
+        if arguments.jobs > 1 and len(pending) > 1:
+            with concurrent.futures.ProcessPoolExecutor(arguments.jobs) as executor:
+                futures = {executor.submit(transform, sources[path], settings, outputs, cpp_options) : path for path in pending}
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        finish(futures[future], future.result())
+                    except Exception as exception:
+                        errors[futures[future]] = f"{type(exception).__name__}: {exception}"
+        else:
+            # with cache_subtrees snippets sharing loops (e.g. versions of the same nest) reuse their resolved subtrees
+            shared_cache = TransformCache()
+            for path in pending:
+                try:
+                    finish(path, transform(sources[path], settings, outputs, cpp_options, shared_cache))
+                except Exception as exception:
+                    errors[path] = f"{type(exception).__name__}: {exception}"
+
+        for path in arguments.files:
+            if path in errors:
+                print(f"{path}: failed, {errors[path]}", file = sys.stderr)
+                continue
+
+            result = results[path]
+            output_stem = CommandLine.output_stem(path, arguments.output_dir)
+            output_stem.parent.mkdir(parents = True, exist_ok = True)
+            sizes = []
+            for output in outputs:
+                output_path = output_stem.with_name(output_stem.name + CommandLine.suffixes[output])
+                output_path.write_text(result[output])
+                sizes.append(f"{output} {len(result[output].splitlines())} lines / {len(result[output])} bytes")
+            cached = " (cached)" if result["cached"] else ""
+            print(f"{path}: {result['time']:.2f}s{cached}, {', '.join(sizes)}")
+            for reason in result["budget_report"]:
+                print(f"    {reason}")
+
+        return 1 if errors else 0
+
+    pass
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(CommandLine.main(sys.argv[1:]))
+
+    python_string = """
+for x in range(a + 1, b + 1):
+    if c < x:
+        r += 2
+    if c < x:
+        # r += x + 1
+        # r2 += 2 + x
+        # r += 3*x + 7
+        # if c < y:
+        #     k = y * 7
+        #     r += max(k, x + 1)
+        #     r += k
+             for z in range(q + 1, max(500, x + 1)):
+        #     #for z in range(q + 1, x + 1):
+                 r += 5
+    # else:
+        #r 2 += x * 10
+        # r += x * 2
+    """
+    
+    python_string = """
+#for i in range(min0, min(UPPER, SUM) + 1):
+
+#SUM_i = SUM - i
+#for j in range(min1, min(UPPER, SUM_i) + 1):
+
+SUM_i_j = SUM_i - j
+for k in range(min2, min(UPPER, SUM_i_j) + 1):
+    SUM_i_j_k = SUM_i_j - k
+    for l in range(min3, min(UPPER, SUM_i_j_k) + 1):
+        SUM_i_j_k_l = SUM_i_j_k - l
+        m = SUM_i_j_k_l
+        if (min4 <= m) & (m <= UPPER):
+            result += 1
+    """
+
+    context = TransformContext()
+    resolved = Python.parse(python_string, context = context).resolve(context)
+    cse = resolved.cse(context)
+    print()
+    for reason in context.budget.report:
+        print(reason)
+    print(f"python:\n{cse.dump_python()}")
+    #print(f"c++:\n{cse.dump_cpp()}")
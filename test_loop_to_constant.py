@@ -0,0 +1,225 @@
+"""
+tests of the transformation, run them with python -m pytest
+the snippets of benchmark.py (the loops of the readme and the small depths of the real world example) are resolved
+and compared with the transformed code by the differential fuzzer
+"""
+import json, math, typing
+import pytest, sympy
+import loop_to_constant as ltc, benchmark, fuzz
+
+
+FUZZ_CASES = {name : source for name, source in benchmark.CASES.items() if name not in ("real_world_3", "real_world_4")}
+"""the cases fuzz.py checks by default, the larger depths of the real world example take minutes"""
+
+a, b, c, d = sympy.symbols("a b c d")
+
+
+def assert_equivalent(source : str, transformed : typing.Any, trials : int = 500) -> None:
+    """execute the loops and the transformed code (anything with dump_python) for random and boundary parameters and compare the results"""
+    mismatch = fuzz.fuzz(source, transformed, trials)
+    assert mismatch is None, repr(mismatch)
+
+@pytest.mark.parametrize("name", FUZZ_CASES)
+def test_case(name : str):
+    source = FUZZ_CASES[name]
+    context = ltc.TransformContext()
+    assert_equivalent(source, ltc.Python.parse(source, context = context).resolve(context).cse(context))
+
+def test_python_output_imports_math():
+    python = ltc.transform(benchmark.CASES["real_world_2"], outputs = ["python"])["python"]
+    assert "math.comb(" in python and python.startswith("import math\n")
+    namespace = {"SUM_i" : 3, "j" : 1, "UPPER" : 2, "min2" : 0, "min3" : 0, "min4" : 0}
+    exec(python, namespace)
+
+@pytest.mark.parametrize("backend", ["splitting", "polyhedral"])
+def test_chambers(backend : str):
+    source = benchmark.CASES["max_min"]
+    resolved_block = ltc.Python.parse(source).resolve(ltc.TransformContext(backend = backend))
+    assert_equivalent(source, resolved_block.chambers())
+
+@pytest.mark.parametrize("cse_processes", [1, 2])
+def test_chunked_cse(cse_processes : int):
+    source = benchmark.CASES["max_min"]
+    resolved_block = ltc.Python.parse(source).resolve(ltc.TransformContext(backend = "polyhedral"))
+    context = ltc.TransformContext(cse_chunk_size = 10, cse_processes = cse_processes)
+    cse_block = resolved_block.cse(context)
+    assert context.metrics["cse chunks"] > 1
+    assert_equivalent(source, cse_block)
+
+def test_reorder_max_min_splitting():
+    source = """
+for i in range(a, b):
+    r += max(2*i, i + c) - min(2*i, i + c)
+"""
+    branches = {}
+    for reorder_max_min_splitting in (False, True):
+        context = ltc.TransformContext(reorder_max_min_splitting = reorder_max_min_splitting)
+        resolved_block = ltc.Python.parse(source).resolve(context)
+        assert_equivalent(source, resolved_block.cse(context))
+        branches[reorder_max_min_splitting] = context.metrics["branches"]
+    assert branches[True] < branches[False]
+
+def test_server():
+    server = ltc.TransformServer(max_workers = 1)
+    def call(params : typing.Any) -> dict:
+        return json.loads(server.handle(json.dumps({"jsonrpc" : "2.0", "id" : 1, "method" : "transform", "params" : params})))
+
+    source = benchmark.CASES["index"]
+    assert call({"source" : source, "bogus" : 1})["error"]["code"] == -32602
+    assert call({"source" : source, "settings" : {"bogus" : 1}})["error"]["code"] == -32602
+    assert call({"source" : source, "outputs" : ["java"]})["error"]["code"] == -32602
+    assert call({"source" : source, "settings" : {"checkpoint_dir" : "."}})["error"]["code"] == -32602
+    assert call({"source" : source, "settings" : {"time_budget" : "soon"}})["error"]["code"] == -32602
+    assert call({"source" : source, "settings" : {"branch_budget" : 1.5}})["error"]["code"] == -32602
+    assert call({"source" : source, "settings" : {"backend" : "fastest"}})["error"]["code"] == -32602
+    assert call({"source" : "for i in range(:"})["error"]["code"] == -32603
+
+    # a result cut short by the budget isn't cached
+    settings = {"branch_budget" : 0}
+    assert call({"source" : source, "settings" : settings})["result"]["budget_report"]
+    assert not call({"source" : source, "settings" : settings})["result"]["cached"]
+    assert not call({"source" : source, "outputs" : ["python"]})["result"]["cached"]
+    assert call({"source" : source, "outputs" : ["python"]})["result"]["cached"]
+
+def test_parse_settings():
+    assert ltc.CommandLine.parse_settings(["time_budget=2.5", "branch_budget=None", "backend='polyhedral'"]) == {"time_budget" : 2.5, "branch_budget" : None, "backend" : "polyhedral"}
+    for assignment in ("time_budget='soon'", "simplify_dnf=1", "bogus=True"):
+        with pytest.raises(TypeError):
+            ltc.CommandLine.parse_settings([assignment])
+
+def test_transform_cache():
+    cache = ltc.TransformCache(max_entries = 2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert len(cache) == 2 and cache.get("b") is None and cache.get("a") == 1
+
+def test_unrank_without_parameters():
+    source = """
+for i in range(0, 10):
+    for j in range(0, i):
+        r += 1
+"""
+    unrank_block = ltc.Python.parse(source).unrank()
+    assert "std::array<long long, 2> unrank(long long rank)\n" in unrank_block.dump_cpp()
+    namespace = {"math" : math}
+    exec(unrank_block.dump_python(), namespace)
+    assert [tuple(namespace["unrank"](rank)) for rank in range(45)] == [(i, j) for i in range(0, 10) for j in range(0, i)]
+
+def test_partition_without_parameters():
+    source = """
+for i in range(0, 10):
+    for j in range(0, i):
+        r += 1
+"""
+    partition_block = ltc.Python.parse(source).partition()
+    cpp = partition_block.dump_cpp()
+    assert "long long count_prefix(long long i_bound)\n" in cpp and "partition(long long chunks)\n" in cpp and "count_prefix(end);" in cpp
+    namespace = {}
+    exec(partition_block.dump_python(), namespace)
+    bounds = namespace["partition"](3)
+    assert bounds[0] == 0 and bounds[-1] == 10 and bounds == sorted(bounds)
+
+def test_irredundant():
+    system = ltc.LinearSystem()
+    assert system.irredundant([a < b, a < b + 1, b < c]) == [a < b, b < c]
+    assert system.irredundant([a < b, b < a]) is None
+    # max/min are compared by their arguments
+    assert system.irredundant([sympy.Max(a, b) < c, a < c]) == [sympy.Max(a, b) < c]
+    # the inequalities of the system are taken into account but not returned
+    assert system.add_condition(a <= b).irredundant([a < c, b < c]) == [b < c]
+    # relationals which aren't linear are kept
+    assert system.irredundant([a * b < c, a * b < c + 1]) == [a * b < c, a * b < c + 1]
+
+def test_simplify():
+    simplify = ltc.LinearSystem.simplify
+    # a < b and a <= b - 1 are the same over the integers
+    assert simplify(sympy.And(a < b, a <= b - 1, c <= 5)) == sympy.And(a < b, c <= 5)
+    assert simplify(sympy.And(a <= 3, a <= 5)) == (a <= 3)
+    assert simplify(sympy.And(a < b, b < a)) == sympy.false
+    assert simplify(sympy.And(a <= 3, a >= 4)) == sympy.false
+    assert simplify(sympy.And(a <= 3, sympy.Eq(a, 5))) == sympy.false
+    # b cancels out
+    assert simplify(a + b < b + 2) == (a <= 1)
+    disjunction = sympy.Or(a < b, c < d)
+    assert simplify(disjunction) is disjunction
+
+def test_merge_complementary():
+    context = ltc.TransformContext()
+    merge = ltc.ResolvedBlock._merge_complementary
+    assert merge([[c < d, a < b], [c < d, a >= b]], context) == [[c < d]]
+    # both a < b and a > b are false for a == b
+    assert merge([[c < d, a < b], [c < d, a > b]], context) == [[c < d, a < b], [c < d, a > b]]
+    # the conjuncts which aren't shared have to be complementary under the assumptions
+    assert merge([[a < b], [c < d]], ltc.TransformContext()) == [[a < b], [c < d]]
+    assumed = ltc.TransformContext()
+    assumed.assumptions = assumed.assumptions.add_condition(sympy.Eq(b - a, c - d + 1))
+    assert merge([[a < b], [c < d]], assumed) == [[]]
+    assert merge([[a < b, c < d], [a < b, c >= d], [a >= b]], context) == [[]]
+    assert context.metrics["merged branches"] == 3
+
+def test_symmetries():
+    source = """
+for i in range(0, a):
+    for j in range(0, b):
+        r += x*y + x + y
+"""
+    statement_block = ltc.Python.parse(source)
+    # x and y only occur in the increment, sorting them would prune nothing
+    assert [[str(parameter) for parameter in group] for group in statement_block.symmetries()] == [["a", "b"]]
+    python = statement_block.resolve().cse().dump_python()
+    assert "min(x, y)" not in python and "max(x, y)" not in python
+    assert_equivalent(source, statement_block.resolve().cse())
+
+def test_checkpoints(tmp_path):
+    source = benchmark.CASES["max_min"]
+    context = ltc.TransformContext(checkpoint_dir = str(tmp_path), time_budget = 600)
+    resolved_block = ltc.Python.parse(source, context = context).resolve(context)
+    assert context.metrics["checkpoints saved"] == 2
+
+    # a retry with a larger budget reuses the checkpoints
+    restarted = ltc.TransformContext(checkpoint_dir = str(tmp_path), time_budget = 1200)
+    assert ltc.Python.parse(source, context = restarted).resolve(restarted).cse().dump_python() == resolved_block.cse().dump_python()
+    assert restarted.metrics["checkpoints loaded"] == 1
+
+    # the leaves are data, a checkpoint naming an unknown class or an arbitrary string is a miss
+    for leaf in (["NoSuchClass", {"rational" : [1, 1]}], ["sympify", {"rational" : [1, 1]}], "__import__('os').system('false')"):
+        for path in tmp_path.glob("*.json"):
+            path.write_text(json.dumps([{"increment" : [{"symbol" : "result", "assumptions" : {}}, leaf]}]))
+        corrupted = ltc.TransformContext(checkpoint_dir = str(tmp_path))
+        assert ltc.Python.parse(source, context = corrupted).resolve(corrupted).cse().dump_python() == resolved_block.cse().dump_python()
+        assert "checkpoints loaded" not in corrupted.metrics
+
+def test_subtree_cache():
+    source = benchmark.CASES["max_min"]
+    cache = ltc.TransformCache()
+    first = ltc.TransformContext(cache_subtrees = True, cache = cache, branch_budget = 1000)
+    output = ltc.Python.parse(source, context = first).resolve(first).cse().dump_python()
+
+    # the counters of the cached subtrees are replayed
+    second = ltc.TransformContext(cache_subtrees = True, cache = cache, branch_budget = 2000)
+    assert ltc.Python.parse(source, context = second).resolve(second).cse().dump_python() == output
+    assert second.metrics["subtree cache hits"] == 1
+    for name in ("branches", "split cases", "summations"):
+        assert second.metrics[name] == first.metrics[name]
+
+    # subtrees aren't cached by default
+    third = ltc.TransformContext(cache = cache)
+    ltc.Python.parse(source, context = third).resolve(third)
+    assert "subtree cache hits" not in third.metrics
+
+@pytest.mark.parametrize("name", ["if", "triangular", "max_min"])
+def test_tighten_loop_bounds(name : str):
+    source = benchmark.CASES[name]
+    context = ltc.TransformContext(tighten_loop_bounds = True)
+    assert_equivalent(source, ltc.Python.parse(source, context = context).resolve(context).cse(context), trials = 200)
+    assert context.metrics["tightened loops"] > 0
+
+@pytest.mark.parametrize("settings", [{"branch_budget" : 0}, {"time_budget" : 0}])
+def test_tighten_loop_bounds_budget(settings : dict):
+    source = benchmark.CASES["max_min"]
+    context = ltc.TransformContext(tighten_loop_bounds = True, **settings)
+    cse = ltc.Python.parse(source, context = context).resolve(context).cse(context)
+    assert context.budget.report and all("not tightened" in reason for reason in context.budget.report)
+    assert_equivalent(source, cse, trials = 200)